@@ -0,0 +1,51 @@
+"""
+Startup time of parsing the input CSVs against loading their compiled file,
+for generated inputs written out as CSVs. Mapping the compiled file only
+reads its header and unchanged inputs are not hashed again, so building
+the doctors and their time-off is most of loading it. Shifts' conflicts are
+copied in one piece and sliced lazily, so they no longer grow the load time
+faster than the rows.
+
+Run from the repository root: python -m benchmarks.bench_cache
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.generator import generate, write_inputs
+from cache import CompiledInputs, load_inputs
+
+# Best of this many loads, mapping the file is too quick to time once
+REPEATS = 5
+
+
+def main():
+    print(f'{"doctors":>8} {"shifts":>7} {"conflicts":>10} {"parse ms":>9} {"map ms":>7} {"load ms":>8} '
+          f'{"load ms/1000 rows":>18}')
+    # Copies of the shifts overlap each other, like sites sharing a timetable,
+    # so conflicts grow with copies squared
+    for num_doctors, copies in [(50, 1), (200, 2), (500, 4)]:
+        block, doctors, shifts = generate(num_doctors=num_doctors, timeoff_density=0.1)
+        with tempfile.TemporaryDirectory() as directory:
+            doctors_file, shifts_file = write_inputs(directory, doctors, shifts, copies)
+            start = time.perf_counter()
+            load_inputs(block, doctors_file, shifts_file, directory)
+            parse = time.perf_counter() - start
+
+            path = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.bin')][0]
+            mapped = load = float('inf')
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                CompiledInputs(path).close()
+                mapped = min(mapped, time.perf_counter() - start)
+
+                start = time.perf_counter()
+                doctors, shifts = load_inputs(block, doctors_file, shifts_file, directory)
+                load = min(load, time.perf_counter() - start)
+        rows = len(doctors) + len(shifts)
+        conflicts = sum(len(shift.conflicts) for shift in shifts)
+        print(f'{len(doctors):>8} {len(shifts):>7} {conflicts:>10} {parse * 1e3:>9.1f} {mapped * 1e3:>7.3f} '
+              f'{load * 1e3:>8.1f} {load * 1e6 / rows:>18.2f}')
+
+if __name__ == "__main__":
+    main()
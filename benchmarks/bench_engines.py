@@ -0,0 +1,37 @@
+"""
+Search time with each availability engine on synthetic blocks of growing
+rosters. Every engine builds the same schedule, so only the time differs.
+The numpy engine is skipped if numpy is not installed.
+
+Run from the repository root: python -m benchmarks.bench_engines
+"""
+import time
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.schedule import Schedule
+from classes.table import np
+
+
+def run(block, num_doctors, num_shifts, engine, node_limit):
+    doctors = make_doctors(block, num_doctors)
+    shifts = make_shifts(block, num_shifts, senior_nights=2)
+    start = time.perf_counter()
+    schedule = Schedule(block, doctors, shifts, engine=engine, node_limit=node_limit)
+    elapsed = time.perf_counter() - start
+    return schedule, elapsed
+
+
+def main(node_limit=20000):
+    block = Block(1, 28)
+    engines = ['python', 'bitset'] + (['numpy'] if np is not None else [])
+
+    print(f'{"doctors":>8} {"shifts":>7} {"engine":>7} {"nodes":>7} {"seconds":>8}')
+    for num_doctors, num_shifts in [(60, 300), (120, 600), (240, 1200)]:
+        for engine in engines:
+            schedule, elapsed = run(block, num_doctors, num_shifts, engine, node_limit)
+            print(f'{num_doctors:>8} {num_shifts + 54:>7} {engine:>7} {schedule.nodes:>7} {elapsed:>8.2f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Cost of Schedule.filter_available_doctors as doctors hold more mandatory
+time-off, compared with scanning every TimeOff. Assigned shifts and their
+rest are not stored as time-off, they block conflicting shifts through
+Doctor.blocked, so time-off is added directly to grow the index.
+
+Run from the repository root: python -m benchmarks.bench_filter
+"""
+import timeit
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.schedule import Schedule
+
+
+def index_timeoff(doctors, shift):
+    return [doctor for doctor in doctors if not doctor.is_on_timeoff(shift)]
+
+
+def scan_timeoff(doctors, shift):
+    return [doctor for doctor in doctors
+            if not any(timeoff.start < shift.end and shift.start < timeoff.end
+                       for timeoff in doctor.mandatory_timeoff)]
+
+
+def main(num_doctors=50, repeat=200):
+    block = Block(1, 28)
+    doctors = make_doctors(block, num_doctors)
+    shifts = make_shifts(block, 2000)
+    # Search is not needed, only the filter
+    schedule = Schedule.__new__(Schedule)
+    # A late shift that few of the accumulated time-offs overlap
+    shift = shifts[block.end - block.start]
+
+    print(f'{"shifts":>8} {"timeoffs/doctor":>16} {"filter us":>10} {"index us":>10} {"scan us":>10}')
+    assigned = 0
+    for num_shifts in [0, 250, 500, 1000, 2000]:
+        for other in shifts[assigned:num_shifts]:
+            # Two time-offs per shift, at the hours the shifts start
+            doctor = doctors[assigned % num_doctors]
+            doctor.add_mandatory_time_off(other.start_day, other.start_time, other.duration)
+            doctor.add_mandatory_time_off(other.start_day, other.start_time, 1)
+            assigned += 1
+        available = timeit.timeit(lambda: schedule.filter_available_doctors(doctors, shift), number=repeat)
+        index = timeit.timeit(lambda: index_timeoff(doctors, shift), number=repeat)
+        scan = timeit.timeit(lambda: scan_timeoff(doctors, shift), number=repeat)
+        timeoffs = sum(len(doctor.mandatory_timeoff) for doctor in doctors) / num_doctors
+        print(f'{num_shifts:>8} {timeoffs:>16.1f} {available / repeat * 1e6:>10.1f} '
+              f'{index / repeat * 1e6:>10.1f} {scan / repeat * 1e6:>10.1f}')
+
+
+if __name__ == "__main__":
+    main()
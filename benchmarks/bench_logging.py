@@ -0,0 +1,77 @@
+"""
+Search throughput with logging left at its default, which formats nothing,
+with every assignment and backtrack logged at TRACE to a buffer, and with
+the prints logging replaced. The print path is reproduced by wrapping
+Shift.assign_doctor and Shift.unassign_doctor to print the shift and the
+whole doctor, as they did before, with stdout sent to a buffer.
+
+Run from the repository root: python -m benchmarks.bench_logging
+"""
+import contextlib
+import io
+import logging
+import time
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.log import TRACE
+from classes.schedule import Schedule
+from classes.shift import Shift
+
+
+@contextlib.contextmanager
+def printing():
+    assign_doctor = Shift.assign_doctor
+    unassign_doctor = Shift.unassign_doctor
+
+    def print_assign(shift, doctor):
+        assign_doctor(shift, doctor)
+        print(f'Assigning Shift:{shift} to Doctor:{doctor}')
+
+    def print_unassign(shift, doctor):
+        unassign_doctor(shift, doctor)
+        print(f'Unassigning Shift:{shift} to Doctor:{doctor}')
+
+    Shift.assign_doctor = print_assign
+    Shift.unassign_doctor = print_unassign
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        Shift.assign_doctor = assign_doctor
+        Shift.unassign_doctor = unassign_doctor
+
+
+@contextlib.contextmanager
+def tracing():
+    root = logging.getLogger()
+    level = root.level
+    handler = logging.StreamHandler(io.StringIO())
+    root.addHandler(handler)
+    root.setLevel(TRACE)
+    try:
+        yield
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(level)
+
+
+def main(node_limit=5000):
+    block = Block(1, 28)
+    modes = {'default': contextlib.nullcontext, 'trace': tracing, 'print': printing}
+
+    print(f'{"doctors":>8} {"shifts":>7} {"logging":>8} {"nodes":>7} {"seconds":>8} {"nodes/s":>9}')
+    for num_doctors, num_shifts in [(20, 100), (25, 150), (60, 300)]:
+        for mode, context in modes.items():
+            doctors = make_doctors(block, num_doctors)
+            shifts = make_shifts(block, num_shifts, senior_nights=1 if num_doctors < 60 else 2)
+            with context():
+                start = time.perf_counter()
+                schedule = Schedule(block, doctors, shifts, propagate=True, node_limit=node_limit)
+                elapsed = time.perf_counter() - start
+            print(f'{num_doctors:>8} {len(shifts):>7} {mode:>8} {schedule.nodes:>7} {elapsed:>8.2f} '
+                  f'{schedule.nodes / elapsed:>9.0f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Nodes (doctor assignments) explored filling shifts in start order and
+fewest-doctors-first, on synthetic blocks with few doctors for the senior
+nights. A run that ends below node_limit without a schedule proved that no
+schedule exists.
+
+Run from the repository root: python -m benchmarks.bench_ordering
+"""
+import time
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.schedule import Schedule
+
+
+def main(node_limit=5000):
+    block = Block(1, 28)
+    cases = [(20, 100), (25, 150), (30, 200), (60, 300)]
+
+    print(f'{"doctors":>8} {"shifts":>7} {"order":>14} {"complete":>9} {"nodes":>7} {"seconds":>8}')
+    for num_doctors, num_shifts in cases:
+        for order in ['chronological', 'mrv']:
+            doctors = make_doctors(block, num_doctors)
+            shifts = make_shifts(block, num_shifts, senior_nights=1 if num_doctors < 60 else 2)
+            start = time.perf_counter()
+            schedule = Schedule(block, doctors, shifts, order=order, propagate=True, node_limit=node_limit)
+            elapsed = time.perf_counter() - start
+            if schedule.schedule is not None:
+                complete = 'yes'
+            elif schedule.stopped:
+                complete = 'limit'
+            else:
+                complete = 'no'
+            print(f'{num_doctors:>8} {len(shifts):>7} {order:>14} {complete:>9} {schedule.nodes:>7} {elapsed:>8.2f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Nodes (doctor assignments) explored with and without propagation, on the
+shifts in settings/shifts.csv and on larger synthetic blocks. The settings
+doctors are replaced by synthetic ones. Runs stop at node_limit.
+
+Run from the repository root: python -m benchmarks.bench_propagation
+"""
+import time
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.schedule import Schedule
+from parse import parse_shifts
+
+
+def run(block, num_doctors, shifts_factory, propagate, node_limit):
+    doctors = make_doctors(block, num_doctors)
+    shifts = shifts_factory()
+    start = time.perf_counter()
+    schedule = Schedule(block, doctors, shifts, propagate=propagate, node_limit=node_limit)
+    elapsed = time.perf_counter() - start
+    return schedule, elapsed
+
+
+def main(node_limit=20000):
+    block = Block(1, 28)
+    cases = [
+        ('settings/shifts.csv', 48, lambda: parse_shifts(block, 'settings/shifts.csv')),
+        ('synthetic 300+54 shifts', 60, lambda: make_shifts(block, 300, senior_nights=2)),
+        ('synthetic 600+54 shifts', 120, lambda: make_shifts(block, 600, senior_nights=2)),
+        ('synthetic 150+27 shifts', 25, lambda: make_shifts(block, 150, senior_nights=1)),
+    ]
+
+    print(f'{"case":>24} {"doctors":>8} {"propagate":>10} {"complete":>9} {"nodes":>8} {"seconds":>8}')
+    for name, num_doctors, shifts_factory in cases:
+        for propagate in [False, True]:
+            schedule, elapsed = run(block, num_doctors, shifts_factory, propagate, node_limit)
+            if schedule.schedule is not None:
+                complete = 'yes'
+            elif schedule.nodes == node_limit:
+                complete = 'limit'
+            else:
+                complete = 'no'
+
+            print(f'{name:>24} {num_doctors:>8} {str(propagate):>10} {complete:>9} {schedule.nodes:>8} {elapsed:>8.2f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Ranking doctors for one shift with cmp_to_key(compare_doctors) against the
+rank_doctor key, both as a full sort and as best-only selection.
+
+Run from the repository root: python -m benchmarks.bench_ranking
+"""
+import random
+import timeit
+from functools import cmp_to_key
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.schedule import Schedule, compare_doctors
+
+
+def vary(doctors, rng):
+    """
+    Spread doctors over different counters so comparisons reach later keys.
+    """
+    for doctor in doctors:
+        doctor.consecutive_night_shifts = rng.randint(0, 1)
+        doctor.consecutive_weekend_shifts = rng.randint(0, 1)
+        doctor.actual_weekends = rng.randint(0, 2)
+        doctor.actual_nights = rng.randint(0, 3)
+        doctor.actual_hours = rng.randint(0, 100)
+
+
+def main(sizes=(50, 500, 5000), seed=0):
+    rng = random.Random(seed)
+    block = Block(1, 28)
+    shift = make_shifts(block, 1)[0]
+    schedule = Schedule.__new__(Schedule)
+
+    print(f'{"doctors":>8} {"cmp sort ms":>12} {"key sort ms":>12} {"best ms":>10}')
+    for size in sizes:
+        doctors = make_doctors(block, size)
+        vary(doctors, rng)
+        repeat = max(1, 5000 // size)
+
+        comparator = cmp_to_key(lambda doctor1, doctor2: compare_doctors(doctor1, doctor2, shift))
+        by_cmp = sorted(doctors, key=comparator)
+        by_key = schedule.sort_doctors(doctors, shift)
+        assert by_cmp == by_key
+        assert schedule.best_doctor(doctors, shift) is by_cmp[-1]
+
+        cmp_sort = timeit.timeit(lambda: sorted(doctors, key=comparator), number=repeat)
+        key_sort = timeit.timeit(lambda: schedule.sort_doctors(doctors, shift), number=repeat)
+        best = timeit.timeit(lambda: schedule.best_doctor(doctors, shift), number=repeat)
+        print(f'{size:>8} {cmp_sort / repeat * 1e3:>12.3f} {key_sort / repeat * 1e3:>12.3f} {best / repeat * 1e3:>10.3f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Plain search against randomized restarts on the synthetic blocks from
+bench_ordering. Plain search stops at node_limit, restarts stop after
+max_attempts. A run that ends without a schedule before its limit proved
+that no schedule exists.
+
+Run from the repository root: python -m benchmarks.bench_restarts
+"""
+import time
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.restarts import Restarts
+from classes.schedule import Schedule
+
+
+def main(node_limit=20000, base=50, factor=1.2, max_attempts=20):
+    block = Block(1, 28)
+    cases = [(20, 100), (25, 150), (30, 200)]
+
+    print(f'{"doctors":>8} {"shifts":>7} {"search":>10} {"complete":>9} {"attempts":>9} {"nodes":>7} '
+          f'{"backtracks":>11} {"seconds":>8}')
+    for num_doctors, num_shifts in cases:
+        for search in ['plain', 'luby', 'geometric']:
+            doctors = make_doctors(block, num_doctors)
+            shifts = make_shifts(block, num_shifts, senior_nights=1)
+            start = time.perf_counter()
+            if search == 'plain':
+                schedule = Schedule(block, doctors, shifts, propagate=True, node_limit=node_limit)
+                found, attempts = schedule.schedule, 1
+                nodes, backtracks = schedule.nodes, schedule.backtracks
+                stopped = schedule.stopped
+            else:
+                restarts = Restarts(block, doctors, shifts, seed=0, cutoffs=search, base=base, factor=factor,
+                                    max_attempts=max_attempts, propagate=True)
+                found, attempts = restarts.schedule, len(restarts.attempts)
+                nodes = sum(stats['nodes'] for stats in restarts.attempts)
+                backtracks = sum(stats['backtracks'] for stats in restarts.attempts)
+                stopped = not restarts.exhausted
+            elapsed = time.perf_counter() - start
+            if found is not None:
+                complete = 'yes'
+            elif stopped:
+                complete = 'limit'
+            else:
+                complete = 'no'
+            print(f'{num_doctors:>8} {len(shifts):>7} {search:>10} {complete:>9} {attempts:>9} {nodes:>7} '
+                  f'{backtracks:>11} {elapsed:>8.2f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Nodes (doctor assignments) explored with and without symmetry breaking.
+Identical morning shifts take every doctor of a seniority, so nobody is
+left for the evening and search has to prove no schedule exists. Without
+symmetry breaking it tries every ordering of the doctors on the mornings.
+The synthetic blocks from bench_ordering are run with fewest-doctors-first
+ordering.
+
+Run from the repository root: python -m benchmarks.bench_symmetry
+"""
+import time
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.doctor import Doctor
+from classes.schedule import Schedule
+from classes.shift import Shift
+
+
+def make_identical_case(block, num_doctors):
+    doctors = [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(num_doctors)]
+    shifts = [Shift(block, 'Acute 1', 2, 7, 8, [0]) for _ in range(num_doctors)]
+    shifts.append(Shift(block, 'Resus', 2, 20, 8, [0]))
+    return doctors, shifts
+
+
+def main(node_limit=200000):
+    block = Block(1, 28)
+    cases = [(f'{n} identical mornings', {}, lambda n=n: make_identical_case(block, n)) for n in [4, 6, 8]]
+    for num_doctors, num_shifts in [(25, 150), (30, 200)]:
+        cases.append((f'synthetic {num_doctors} doctors', {'order': 'mrv', 'propagate': True},
+                      lambda num_doctors=num_doctors, num_shifts=num_shifts:
+                      (make_doctors(block, num_doctors), make_shifts(block, num_shifts, senior_nights=1))))
+
+    print(f'{"case":>24} {"symmetry":>9} {"complete":>9} {"nodes":>7} {"skips":>7} {"seconds":>8}')
+    for name, options, factory in cases:
+        for symmetry in [False, True]:
+            doctors, shifts = factory()
+            start = time.perf_counter()
+            schedule = Schedule(block, doctors, shifts, symmetry=symmetry, node_limit=node_limit, **options)
+            elapsed = time.perf_counter() - start
+            if schedule.schedule is not None:
+                complete = 'yes'
+            elif schedule.stopped:
+                complete = 'limit'
+            else:
+                complete = 'no'
+            print(f'{name:>24} {str(symmetry):>9} {complete:>9} {schedule.nodes:>7} '
+                  f'{schedule.symmetry_skips:>7} {elapsed:>8.2f}')
+
+
+if __name__ == "__main__":
+    main()
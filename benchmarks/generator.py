@@ -0,0 +1,166 @@
+"""
+Seeded generator of valid doctors and shifts, shared by the benchmarks and
+the tests. generate() follows the times, durations and position preferences
+used in settings/shifts.csv and has a ladder of named cases for
+benchmarks/run.py. make_doctors() and make_shifts() build the plainer
+rosters and timetables the micro-benchmarks grow, and write_inputs() writes
+doctors and shifts out as input CSVs.
+"""
+import csv
+import os
+import random
+
+from classes.block import Block
+from classes.doctor import Doctor
+from classes.shift import Shift
+from classes.timeoff import TimeOff
+
+# (start time, duration, position preferences) of each location's daily shifts
+LOCATION_SHIFTS = {
+    'Acute 1': [(7, 9, [0, 1, 2, 3, 4]), (19, 12, [0, 1, 2, 3, 4])],
+    'Acute 2': [(7, 9, [1, 2]), (15, 9, [0, 1, 2])],
+    'Mid-Fast': [(11, 9, [0, 1]), (15, 8, [3, 4])],
+    'PIT': [(10, 9, [1, 2, 3, 4])],
+    'Pediatrics': [(15, 9, [4, 3])],
+    'Resus': [(7, 12, [2, 3]), (19, 12, [3, 2])],
+    'Resus Senior': [(19, 12, [4])],
+    'Resus Shadow': [(7, 9, [1])],
+    'Senior': [(7, 12, [4]), (23, 8, [4])],
+}
+
+
+def generate(seed=0, num_doctors=30, locations=None, block_days=28, timeoff_density=0.0,
+             seniority_mix=(1, 1, 1, 1, 1), coverage=1.0):
+    """
+    A block of block_days days with num_doctors doctors, whose seniorities
+    are drawn with the seniority_mix weights (off service to fourth year).
+    Each location (all by default) gets each of its daily shifts with
+    probability coverage, except that residents are at conference on
+    Wednesday mornings. Each doctor has each day off with probability
+    timeoff_density, and requests one day off with the same probability.
+    Returns (block, doctors, shifts).
+    """
+    assert num_doctors > 0, f"Number of doctors is {num_doctors}, but must be positive"
+    assert len(seniority_mix) == 5, f"Seniority mix is {seniority_mix}, but must weigh 5 seniorities"
+    assert 0 <= timeoff_density <= 1, f"Time-off density is {timeoff_density}, but must be between 0 and 1"
+    assert 0 < coverage <= 1, f"Coverage is {coverage}, but must be between 0 and 1"
+    if locations is None:
+        locations = sorted(LOCATION_SHIFTS)
+
+    rng = random.Random(seed)
+    block = Block(1, block_days)
+    doctors = []
+    for i in range(num_doctors):
+        name = f'Doctor {i}'
+        seniority = rng.choices(range(5), weights=seniority_mix)[0]
+        mandatory = [TimeOff(block, name, day, 7, 24) for day in range(block.start, block.end + 1)
+                     if rng.random() < timeoff_density]
+        requested = []
+        if rng.random() < timeoff_density:
+            requested.append(TimeOff(block, name, rng.randint(block.start, block.end), 7, 24, mandatory=False))
+        doctors.append(Doctor(block, name, seniority, carry_hours=0.0,
+                              requested_timeoff=requested, mandatory_timeoff=mandatory))
+
+    shifts = []
+    for day in range(block.start, block.end + 1):
+        for location in locations:
+            for start_time, duration, position_preferences in LOCATION_SHIFTS[location]:
+                if day % 7 == 3 and start_time < 15 and 7 < start_time + duration:
+                    # Only off service can work during the Wednesday conference
+                    if 0 not in position_preferences:
+                        continue
+                    position_preferences = [0]
+                if rng.random() < coverage:
+                    shifts.append(Shift(block, location, day, start_time, duration, list(position_preferences)))
+    return block, doctors, shifts
+
+
+# Named cases for the runner, with whether a schedule exists for seed 0 if it
+# is known. Medium backtracks before it completes.
+LADDER = {
+    'easy': {'options': {'num_doctors': 30, 'locations': ['Acute 1', 'Acute 2', 'PIT'], 'coverage': 0.5},
+             'expected': 'complete'},
+    'medium': {'options': {'num_doctors': 48, 'coverage': 0.7, 'timeoff_density': 0.15}, 'expected': 'complete'},
+    'hard': {'options': {'num_doctors': 60, 'coverage': 0.8, 'timeoff_density': 0.1}, 'expected': None},
+    # Senior shifts only take fourth years and there are none
+    'infeasible seniority': {'options': {'num_doctors': 30, 'locations': ['Acute 1', 'Senior'],
+                                         'seniority_mix': (1, 1, 1, 1, 0)},
+                             'expected': 'impossible'},
+    # Too few fourth years to cover a senior shift every night
+    'infeasible nights': {'options': {'num_doctors': 20, 'locations': ['Acute 1', 'Resus Senior'],
+                                      'seniority_mix': (9, 9, 0, 0, 1)},
+                          'expected': 'impossible'},
+}
+
+
+def make_doctors(block, num_doctors):
+    doctors = []
+    for i in range(num_doctors):
+        doctors.append(Doctor(block, f'Doctor {i}', i % 5, carry_hours=0.0))
+    return doctors
+
+
+def make_busy_doctors(block, num_doctors, seed=0):
+    """
+    Doctors as if partway through a search, with random nights, weekends,
+    strings and weekly hours, so every filter check rules some out.
+    """
+    rng = random.Random(seed)
+    doctors = make_doctors(block, num_doctors)
+    for doctor in doctors:
+        doctor.actual_nights = rng.randint(0, 10)
+        doctor.actual_weekends = rng.randint(0, 5)
+        doctor.consecutive_night_shifts = rng.randint(0, 5)
+        doctor.consecutive_weekend_shifts = rng.randint(0, 2)
+        doctor.weekly_hours = [rng.choice([0, 40, 50, 55]) for _ in range(block.num_weeks())]
+    return doctors
+
+
+def make_shifts(block, num_shifts, senior_nights=0):
+    """
+    Day shifts spread evenly across the block, open to every seniority, and
+    senior_nights night shifts per day that only third and fourth years take.
+    """
+    shifts = []
+    days = block.end - block.start + 1
+    for i in range(num_shifts):
+        day = block.start + i % days
+        shifts.append(Shift(block, 'Acute 1', day, 7 + (i // days) % 12, 8, [4, 3, 2, 1, 0]))
+    for day in range(block.start, block.end):
+        for _ in range(senior_nights):
+            shifts.append(Shift(block, 'Resus Senior', day, 19, 12, [4, 3]))
+    return shifts
+
+
+def is_conference(timeoff):
+    # Generated days off are 24 hours
+    return timeoff.start_day % 7 == 3 and timeoff.start_time == 7 and timeoff.duration == 8
+
+
+def write_inputs(directory, doctors, shifts, copies=1):
+    """
+    Write doctors.csv and shifts.csv to directory, with copies of every
+    shift, and return their paths.
+    """
+    doctors_file = os.path.join(directory, 'doctors.csv')
+    with open(doctors_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'Seniority', 'Chief', 'Carried Hours', 'Requested Day:Time:Duration',
+                         'Mandatory Day:Time:Duration', 'Half Block', 'Pre Block Hours'])
+        for doctor in doctors:
+            # Parsing adds the Wednesday conferences again
+            mandatory = [timeoff for timeoff in doctor.mandatory_timeoff if not is_conference(timeoff)]
+            requested, mandatory = [' '.join(f'{timeoff.start_day}:{timeoff.start_time}:{timeoff.duration}'
+                                             for timeoff in timeoffs) or '_'
+                                    for timeoffs in [doctor.requested_timeoff, mandatory]]
+            writer.writerow([doctor.name, doctor.seniority.value, 'No', 0, requested, mandatory, 'Both', 0])
+
+    shifts_file = os.path.join(directory, 'shifts.csv')
+    with open(shifts_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Location', 'Day', 'Time', 'Duration', 'Position Preferences', 'Optional'])
+        for _ in range(copies):
+            for shift in shifts:
+                writer.writerow([shift.location, shift.start_day, shift.start_time, shift.duration,
+                                 '>'.join(map(str, shift.position_preferences)), shift.optional])
+    return doctors_file, shifts_file
@@ -0,0 +1,101 @@
+"""
+Run the generated case ladder and record, for each case, the search result,
+wall time, nodes, backtracks and peak memory as JSON, so runs before and
+after a change to the search can be compared. Peak memory is measured in a
+second run under tracemalloc, which would slow the timed run.
+
+Run from the repository root, for example:
+python -m benchmarks.run --output results.json --propagate --cases easy hard
+"""
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+from benchmarks.generator import LADDER, generate
+from classes.log import configure
+from classes.schedule import Schedule
+
+
+def run_case(name, seed, options, memory=True):
+    case = LADDER[name]
+    block, doctors, shifts = generate(seed=seed, **case['options'])
+    start = time.perf_counter()
+    schedule = Schedule(block, doctors, shifts, **options)
+    seconds = time.perf_counter() - start
+    if schedule.schedule is not None:
+        status = 'complete'
+    elif schedule.stopped:
+        status = 'stopped'
+    else:
+        status = 'impossible'
+
+    peak = None
+    if memory:
+        block, doctors, shifts = generate(seed=seed, **case['options'])
+        tracemalloc.start()
+        Schedule(block, doctors, shifts, **options)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'case': name,
+        'seed': seed,
+        'doctors': len(doctors),
+        'shifts': len(shifts),
+        'expected': case['expected'],
+        'status': status,
+        'seconds': seconds,
+        'nodes': schedule.nodes,
+        'backtracks': schedule.backtracks,
+        'shortages': len(schedule.shortages),
+        'peak_bytes': peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark ladder')
+    parser.add_argument('--cases', nargs='+', default=list(LADDER), choices=list(LADDER))
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0])
+    parser.add_argument('--output', help='file to write the results to as JSON')
+    parser.add_argument('--node-limit', type=int, default=20000)
+    parser.add_argument('--engine', default='python', choices=['python', 'numpy', 'bitset'])
+    parser.add_argument('--order', default='chronological', choices=['chronological', 'mrv'])
+    parser.add_argument('--propagate', action='store_true')
+    parser.add_argument('--backjump', action='store_true')
+    parser.add_argument('--no-feasibility', action='store_true', help='search without checking for shortages first')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory run')
+    parser.add_argument('--log-level', default='ERROR', help='shortages are logged as warnings')
+    args = parser.parse_args()
+    configure(args.log_level)
+
+    options = {
+        'node_limit': args.node_limit,
+        'engine': args.engine,
+        'order': args.order,
+        'propagate': args.propagate,
+        'backjump': args.backjump,
+        'check_feasibility': not args.no_feasibility,
+    }
+    print(f'{"case":>22} {"seed":>5} {"shifts":>7} {"status":>11} {"nodes":>7} {"backtracks":>11} '
+          f'{"seconds":>8} {"peak MB":>8}')
+    results = []
+    for name in args.cases:
+        for seed in args.seeds:
+            result = run_case(name, seed, options, memory=not args.no_memory)
+            results.append(result)
+            peak = f'{result["peak_bytes"] / 2 ** 20:.1f}' if result['peak_bytes'] is not None else '-'
+            status = result['status'] if result['expected'] in [None, result['status']] \
+                else f'{result["status"]}!'
+            print(f'{name:>22} {seed:>5} {result["shifts"]:>7} {status:>11} {result["nodes"]:>7} '
+                  f'{result["backtracks"]:>11} {result["seconds"]:>8.2f} {peak:>8}')
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(), 'options': options, 'results': results}, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Compiled inputs: the parsed and validated doctors and shifts as flat int32
+and float64 arrays in one file, memory-mapped when loaded. The file is named
+by a hash of the CSVs, the settings and the block, so it is rebuilt only
+when one of them changes. Their contents are only hashed again when one of
+their modification times or sizes changes, a stamp file in the cache
+directory keeps the hash for the last ones seen.
+
+Doctors, time-off and shifts are rebuilt without their constructors, so
+nothing is validated again. Doctors keep their final mandatory time-off,
+Wednesday conferences included, and their weekly, expected hours, nights and
+weekends, and shifts keep their conflicts, so none of them are derived again.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+
+from classes.doctor import Doctor
+from classes.interval import IntervalIndex
+from classes.shift import Shift
+from classes.timeoff import TimeOff
+from parse import parse_doctors, parse_shifts
+import settings.block
+import settings.config
+from settings.config import Seniority
+
+MAGIC = b'RSCH'
+# Bump when the layout or what is stored changes
+VERSION = 2
+HEADER = struct.Struct('<4sIIIIIIII')
+# Carried hours, expected hours and the expected night and weekend ranges
+DOCTOR_FLOATS = 6
+DOCTOR_FIELDS = 10
+TIMEOFF_FIELDS = 5
+SHIFT_FIELDS = 12
+HALF_BLOCKS = ['both', '1', '2']
+SENIORITIES = list(Seniority)
+# Expected hours, nights and weekends, seniorities and locations are derived
+# from these, so compiled files must be rebuilt when they change
+SETTINGS = [settings.config.__file__, settings.block.__file__]
+
+
+def cache_key(block, *filenames):
+    digest = hashlib.sha256(f'{VERSION} {block.start} {block.end}'.encode())
+    for filename in [*SETTINGS, *filenames]:
+        with open(filename, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def stamp_key(block, *filenames):
+    """
+    Names the stamp file for the inputs as they are on disk now, by path,
+    modification time and size. Like make, a file rewritten within the
+    filesystem's timestamp resolution at the same size is missed.
+    """
+    digest = hashlib.sha256(f'{VERSION} {block.start} {block.end}'.encode())
+    for filename in [*SETTINGS, *filenames]:
+        stat = os.stat(filename)
+        digest.update(f'{os.path.abspath(filename)} {stat.st_mtime_ns} {stat.st_size}\n'.encode())
+    return digest.hexdigest()
+
+
+def write_atomic(path, sections):
+    """
+    Write sections to path through a unique temporary file, so a reader
+    never sees a partial file and runs writing the same path at once never
+    write into each other's file.
+    """
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for section in sections:
+                f.write(section if isinstance(section, (bytes, bytearray)) else section.tobytes())
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def compile_inputs(path, doctors, shifts):
+    """
+    Write parsed doctors and shifts to path.
+    """
+    strings = bytearray()
+    offsets = {}
+
+    def string(text):
+        if text not in offsets:
+            offsets[text] = len(strings)
+            strings.extend(text.encode())
+        return offsets[text], len(text.encode())
+
+    num_weeks = len(doctors[0].weekly_hours) if doctors else 0
+    doctor_floats = array('d')
+    doctor_fields = array('i')
+    weekly_hours = array('i')
+    timeoff_fields = array('i')
+    for doctor in doctors:
+        doctor_floats.extend([doctor.carry_hours, doctor.expected_hours, *doctor.expected_night_range,
+                              *doctor.expected_weekend_range])
+        doctor_fields.extend(string(doctor.name))
+        doctor_fields.extend([doctor.seniority.value, doctor.chief, HALF_BLOCKS.index(doctor.half_block),
+                              doctor.pre_block_hours])
+        weekly_hours.extend(doctor.weekly_hours)
+        for timeoffs in [doctor.requested_timeoff, doctor.mandatory_timeoff]:
+            doctor_fields.extend([len(timeoff_fields) // TIMEOFF_FIELDS, len(timeoffs)])
+            for timeoff in timeoffs:
+                timeoff_fields.extend([timeoff.start_day, timeoff.start_time, timeoff.duration, timeoff.start,
+                                       timeoff.week])
+
+    positions = {shift.index: i for i, shift in enumerate(shifts)}
+    shift_fields = array('i')
+    preferences = array('i')
+    conflict_offsets = array('i', [0])
+    conflicts = array('i')
+    for shift in shifts:
+        shift_fields.extend(string(shift.location))
+        shift_fields.extend([shift.start_day, shift.start_time, shift.duration, len(preferences),
+                             len(shift.position_preferences), shift.optional, shift.start, shift.week, shift.night,
+                             shift.weekend])
+        preferences.extend(shift.position_preferences)
+        conflicts.extend(positions[other] for other in shift.conflicts)
+        conflict_offsets.append(len(conflicts))
+
+    header = HEADER.pack(MAGIC, VERSION, len(doctors), num_weeks, len(timeoff_fields) // TIMEOFF_FIELDS,
+                         len(shifts), len(preferences), len(conflicts), len(strings))
+    # float64 first, the header keeps it 8 byte aligned
+    write_atomic(path, [header, doctor_floats, doctor_fields, weekly_hours, timeoff_fields, shift_fields,
+                        preferences, conflict_offsets, conflicts, strings])
+
+
+def build_timeoff(start_day, start_time, duration, start, week):
+    # Validated and derived when the inputs were compiled
+    timeoff = TimeOff.__new__(TimeOff)
+    timeoff._start = start
+    timeoff._end = start + duration
+    timeoff._week = week
+    timeoff.start_day = start_day
+    timeoff.start_time = start_time
+    timeoff.duration = duration
+    return timeoff
+
+
+class Conflicts:
+    """
+    A shift's conflicts, as a slice of every shift's conflicts copied from
+    the compiled file in one piece, instead of a list built per shift. Read
+    like the list link_conflicts builds, and pickled as one.
+    """
+    __slots__ = ['values', 'start', 'stop']
+
+    def __init__(self, values, start, stop):
+        self.values = values
+        self.start = start
+        self.stop = stop
+
+    def __iter__(self):
+        return iter(self.values[self.start:self.stop])
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __contains__(self, index):
+        return index in self.values[self.start:self.stop]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class CompiledInputs:
+    """
+    Views into a memory-mapped compiled file. Mapping it reads nothing but
+    the header, fields are read as doctors and shifts are built. Close it, or
+    use it as a context manager, once they are built.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        (magic, version, num_doctors, num_weeks, num_timeoffs, num_shifts, num_preferences, num_conflicts,
+         num_strings) = HEADER.unpack_from(self.view)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+        assert magic == MAGIC and version == VERSION, f"Compiled inputs {path} are version {version}, but must be {VERSION}"
+
+        offset = HEADER.size
+        self.sections = []
+        for code, length in [('d', num_doctors * DOCTOR_FLOATS), ('i', num_doctors * DOCTOR_FIELDS),
+                             ('i', num_doctors * num_weeks), ('i', num_timeoffs * TIMEOFF_FIELDS),
+                             ('i', num_shifts * SHIFT_FIELDS), ('i', num_preferences), ('i', num_shifts + 1),
+                             ('i', num_conflicts)]:
+            size = length * struct.calcsize(code)
+            self.sections.append(self.view[offset:offset + size].cast(code))
+            offset += size
+        self.sections.append(self.view[offset:offset + num_strings])
+        (self.doctor_floats, self.doctor_fields, self.weekly_hours, self.timeoff_fields, self.shift_fields,
+         self.preferences, self.conflict_offsets, self.conflicts, self.strings) = self.sections
+        self.num_doctors = num_doctors
+        self.num_weeks = num_weeks
+        self.num_shifts = num_shifts
+
+    def close(self):
+        """
+        Unmap the file. Built doctors and shifts hold copies of their fields,
+        so they stay valid.
+        """
+        for section in getattr(self, 'sections', []):
+            section.release()
+        self.view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def string(self, offset, length):
+        return str(self.strings[offset:offset + length], 'utf-8')
+
+    def doctors(self, block):
+        floats = self.doctor_floats.tolist()
+        fields = self.doctor_fields.tolist()
+        weekly_hours = self.weekly_hours.tolist()
+        timeoffs = self.timeoff_fields.tolist()
+        doctors = []
+        for i in range(self.num_doctors):
+            (name_offset, name_length, seniority, chief, half_block, pre_block_hours,
+             requested_first, requested_count, mandatory_first, mandatory_count) = \
+                fields[i * DOCTOR_FIELDS:(i + 1) * DOCTOR_FIELDS]
+            carry_hours, expected_hours, nights_low, nights_high, weekends_low, weekends_high = \
+                floats[i * DOCTOR_FLOATS:(i + 1) * DOCTOR_FLOATS]
+
+            # Validated and derived when the inputs were compiled
+            doctor = Doctor.__new__(Doctor)
+            doctor.block = block
+            doctor.name = self.string(name_offset, name_length)
+            doctor.seniority = SENIORITIES[seniority]
+            doctor.chief = bool(chief)
+            doctor.carry_hours = carry_hours
+            doctor.half_block = HALF_BLOCKS[half_block]
+            doctor.pre_block_hours = pre_block_hours
+            doctor.weekly_hours = weekly_hours[i * self.num_weeks:(i + 1) * self.num_weeks]
+            doctor.requested_timeoff = [build_timeoff(*timeoffs[j:j + TIMEOFF_FIELDS]) for j in
+                                        range(requested_first * TIMEOFF_FIELDS,
+                                              (requested_first + requested_count) * TIMEOFF_FIELDS, TIMEOFF_FIELDS)]
+            doctor.mandatory_timeoff = [build_timeoff(*timeoffs[j:j + TIMEOFF_FIELDS]) for j in
+                                        range(mandatory_first * TIMEOFF_FIELDS,
+                                              (mandatory_first + mandatory_count) * TIMEOFF_FIELDS, TIMEOFF_FIELDS)]
+            doctor.timeoff_index = IntervalIndex((timeoff.start, timeoff.end) for timeoff in doctor.mandatory_timeoff)
+            doctor.expected_hours = expected_hours
+            doctor.expected_night_range = (nights_low, nights_high)
+            doctor.expected_weekend_range = (weekends_low, weekends_high)
+            doctor.reset_assignments()
+            doctors.append(doctor)
+        return doctors
+
+    def shifts(self, block):
+        fields = self.shift_fields.tolist()
+        preferences = self.preferences.tolist()
+        locations = {}
+        shifts = []
+        for i in range(0, len(fields), SHIFT_FIELDS):
+            (location_offset, location_length, start_day, start_time, duration, preferences_first,
+             preferences_count, optional, start, week, night, weekend) = fields[i:i + SHIFT_FIELDS]
+            if location_offset not in locations:
+                locations[location_offset] = self.string(location_offset, location_length)
+
+            # Validated and derived when the inputs were compiled
+            shift = Shift.__new__(Shift)
+            shift._start = start
+            shift._end = start + duration
+            shift._week = week
+            shift.location = locations[location_offset]
+            shift.start_day = start_day
+            shift.start_time = start_time
+            shift.duration = duration
+            shift.position_preferences = preferences[preferences_first:preferences_first + preferences_count]
+            shift.night = bool(night)
+            shift.weekend = bool(weekend)
+            shift.doctor = None
+            shift.optional = bool(optional)
+            shift.index = i // SHIFT_FIELDS
+            shifts.append(shift)
+
+        offsets = self.conflict_offsets.tolist()
+        # Copied, so the shifts outlive the map
+        conflicts = array('i')
+        conflicts.frombytes(self.conflicts.cast('B'))
+        for i, shift in enumerate(shifts):
+            shift.conflicts = Conflicts(conflicts, offsets[i], offsets[i + 1])
+        return shifts
+
+
+def load_inputs(block, doctors_filename, shifts_filename, cache_dir='.cache'):
+    """
+    Doctors and shifts for the block, from the compiled file for these
+    inputs, which is parsed and written first if it does not exist.
+    """
+    stamp = os.path.join(cache_dir, f'{stamp_key(block, doctors_filename, shifts_filename)}.stamp')
+    try:
+        with open(stamp) as f:
+            key = f.read()
+    except FileNotFoundError:
+        key = None
+    if key is None or not os.path.exists(os.path.join(cache_dir, f'{key}.bin')):
+        key = cache_key(block, doctors_filename, shifts_filename)
+        os.makedirs(cache_dir, exist_ok=True)
+        write_atomic(stamp, [key.encode()])
+
+    path = os.path.join(cache_dir, f'{key}.bin')
+    if not os.path.exists(path):
+        doctors = parse_doctors(block, doctors_filename)
+        shifts = parse_shifts(block, shifts_filename)
+        compile_inputs(path, doctors, shifts)
+        return doctors, shifts
+
+    with CompiledInputs(path) as compiled:
+        return compiled.doctors(block), compiled.shifts(block)
@@ -0,0 +1,104 @@
+from settings.config import MAX_CONSECUTIVE_NIGHT_SHIFTS, MAX_CONSECUTIVE_WEEKEND_SHIFTS
+
+
+def doctor_bits(mask):
+    """
+    Rows set in a doctor mask, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def hour_mask(start, end):
+    return ((1 << (end - start)) - 1) << start
+
+
+class BitsetTable:
+    """
+    Availability as Python int bitmasks, an alternative to the time-off
+    index and Doctor counters behind Schedule.filter_available_doctors.
+
+    Doctor masks have one bit per doctor: who is senior enough for a shift
+    and working that day is fixed per shift, and the doctors at a night or
+    weekend limit, or too close to 60 hours in a week, are kept up to date.
+    Hour masks have one bit per block hour: each doctor's mandatory time-off,
+    conferences and the shifts they are assigned with the rest after them.
+    Search refreshes a doctor after assigning or unassigning them, and
+    shifts must be assigned in start order, like search does.
+    """
+    def __init__(self, doctors, shifts):
+        self.doctors = doctors
+        self.rows = {doctor: row for row, doctor in enumerate(doctors)}
+
+        seniority = {}
+        for row, doctor in enumerate(doctors):
+            seniority[doctor.seniority.value] = seniority.get(doctor.seniority.value, 0) | (1 << row)
+
+        # Fixed per shift: seniority, working days and the shift's hours
+        self.eligible = {}
+        self.hours = {}
+        for shift in shifts:
+            eligible = 0
+            for value in shift.position_preferences:
+                eligible |= seniority.get(value, 0)
+            for row in doctor_bits(eligible):
+                if not self.doctors[row].working_on_day(shift.start_day):
+                    eligible &= ~(1 << row)
+            self.eligible[shift] = eligible
+            self.hours[shift] = hour_mask(shift.start, shift.end)
+
+        self.durations = sorted({shift.duration for shift in shifts})
+        self.num_weeks = len(doctors[0].weekly_hours) if doctors else 0
+
+        # Kept up to date by update
+        self.night_full = 0
+        self.weekend_full = 0
+        # Doctors who would pass 60 hours with a shift of each duration in each week
+        self.hours_full = [dict.fromkeys(self.durations, 0) for _ in range(self.num_weeks)]
+        # Blocked hours after each assigned shift, the last is current
+        self.blocked = []
+        for doctor in doctors:
+            blocked = 0
+            for timeoff in doctor.mandatory_timeoff:
+                blocked |= hour_mask(timeoff.start, timeoff.end)
+            self.blocked.append([blocked])
+            self.update(doctor)
+
+    def update(self, doctor):
+        row = self.rows[doctor]
+        bit = 1 << row
+
+        blocked = self.blocked[row]
+        while len(blocked) > len(doctor.shifts) + 1:
+            blocked.pop()
+        for shift in doctor.shifts[len(blocked) - 1:]:
+            blocked.append(blocked[-1] | hour_mask(shift.start, shift.end + shift.duration))
+
+        night_full = doctor.actual_nights == doctor.expected_night_range[1] or \
+            doctor.consecutive_night_shifts == MAX_CONSECUTIVE_NIGHT_SHIFTS
+        self.night_full = self.night_full | bit if night_full else self.night_full & ~bit
+        weekend_full = doctor.actual_weekends == doctor.expected_weekend_range[1] or \
+            doctor.consecutive_weekend_shifts == MAX_CONSECUTIVE_WEEKEND_SHIFTS
+        self.weekend_full = self.weekend_full | bit if weekend_full else self.weekend_full & ~bit
+
+        for week, full in enumerate(self.hours_full):
+            for duration in self.durations:
+                if doctor.weekly_hours[week] + duration > 60:
+                    full[duration] |= bit
+                else:
+                    full[duration] &= ~bit
+
+    def filter_available_doctors(self, shift):
+        """
+        Same doctors, in the same order, as Schedule.filter_available_doctors.
+        """
+        mask = self.eligible[shift] & ~self.hours_full[shift.week][shift.duration]
+        if shift.night:
+            mask &= ~self.night_full
+        if shift.weekend:
+            mask &= ~self.weekend_full
+
+        hours = self.hours[shift]
+        return [self.doctors[row] for row in doctor_bits(mask) if not self.blocked[row][-1] & hours]
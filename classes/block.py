@@ -1,10 +1,36 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
 class Block:
     def __init__(self, block_start=1, block_end=28):
         assert -5 <= block_start <= 7, f"Block start is {block_start}, but must begin within 7 days of day 1"
         assert 22 <= block_end <= 34, f"Block end is {block_end}, but must end within 7 days of day 28"
         self.start = block_start
         self.end = block_end
-        print(f'Creating {self}')
+        logger.debug('Creating %s', self)
 
     def __repr__(self):
         return f'Block=[{self.start}, {self.end}]'
+
+    def hour(self, day, time):
+        """
+        Absolute hour since midnight of the first day of the block.
+        """
+        return (day - self.start) * 24 + time
+
+    def week(self, hour):
+        """
+        Week of the block an absolute hour falls in. Weeks start on Sunday at
+        7am and the week containing the first day of the block is week 0.
+        """
+        # Day 0 is a Sunday
+        sunday = self.hour(0, 7)
+        return (hour - sunday) // 168 - (self.hour(self.start, 7) - sunday) // 168
+
+    def num_weeks(self):
+        """
+        Number of weeks shifts can start in, the last day ends at 7am after it.
+        """
+        return self.week(self.hour(self.end + 1, 7) - 1) + 1
@@ -0,0 +1,106 @@
+import json
+import os
+
+
+def sync_directory(path):
+    """
+    Make a rename into path's directory durable, so a crash cannot bring
+    back the file it replaced.
+    """
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Checkpoint:
+    """
+    Search position on disk, as a log of JSON lines. The first line holds
+    every frame of the search stack, each later line how many frames of the
+    previous position are kept and the frames that replace the rest, so a
+    checkpoint only writes what changed since the last one. A frame is
+    [shift, doctor, doctors left, ranked, conflicts, chronological], with
+    shifts by start order and doctors by input position.
+
+    Lines are appended and synced one at a time and a torn last line is
+    ignored, then replaced by the next save, so a killed run loses at most
+    its last checkpoint. After compact_lines appended lines the whole
+    position is written to a temporary file that replaces the log.
+    """
+    def __init__(self, path, compact_lines=100):
+        assert compact_lines > 0, f"Checkpoint compact_lines is {compact_lines}, but must be positive"
+        self.path = path
+        self.compact_lines = compact_lines
+        self.frames = None
+        self.lines = 0
+        self.writes = 0
+
+    def load(self):
+        """
+        Latest position in the log as (frames, counters), or None if there
+        is no log.
+        """
+        if not os.path.exists(self.path):
+            return None
+        frames = []
+        counters = {}
+        lines = 0
+        torn = False
+        with open(self.path, 'rb') as f:
+            log = f.readlines()
+        for number, line in enumerate(log, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Killed while appending, possibly inside a character
+                if number < len(log):
+                    raise
+                torn = True
+                break
+            frames = frames[:record['keep']] + record['frames']
+            counters = record['counters']
+            lines += 1
+        if lines == 0:
+            return None
+        # Appending after a torn line would leave every later line unreadable,
+        # so the next save rewrites the log instead
+        self.frames = None if torn else frames
+        self.lines = lines
+        return frames, counters
+
+    def save(self, frames, counters):
+        if self.frames is None or self.lines >= self.compact_lines:
+            self.rewrite(frames, counters)
+            return
+
+        keep = 0
+        while keep < min(len(frames), len(self.frames)) and frames[keep] == self.frames[keep]:
+            keep += 1
+        record = {'keep': keep, 'frames': frames[keep:], 'counters': counters}
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.frames = frames
+        self.lines += 1
+        self.writes += 1
+
+    def rewrite(self, frames, counters):
+        record = {'keep': 0, 'frames': frames, 'counters': counters}
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        sync_directory(self.path)
+        self.frames = frames
+        self.lines = 1
+        self.writes += 1
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.frames = None
+        self.lines = 0
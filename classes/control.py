@@ -0,0 +1,23 @@
+class RunControl:
+    """
+    How one search run is driven from outside, as opposed to how it searches:
+    when it gives up, where it saves its position and whether it keeps stats.
+
+    Search gives up after time_limit seconds, counted from when the search
+    starts, or once stop.is_set(). With a checkpoint path, the search stack
+    is saved there every checkpoint_nodes nodes and when search gives up,
+    and with resume, search continues from the position saved there, if any.
+    With stats, the search keeps a SearchStats.
+    """
+    def __init__(self, time_limit=None, stop=None, checkpoint=None, checkpoint_nodes=10000, resume=False,
+                 stats=False):
+        assert time_limit is None or time_limit > 0, f"Time limit is {time_limit}, but must be positive"
+        assert checkpoint_nodes > 0, f"Checkpoint nodes is {checkpoint_nodes}, but must be positive"
+        assert checkpoint is not None or not resume, "Resuming needs a checkpoint"
+
+        self.time_limit = time_limit
+        self.stop = stop
+        self.checkpoint = checkpoint
+        self.checkpoint_nodes = checkpoint_nodes
+        self.resume = resume
+        self.stats = stats
@@ -1,13 +1,67 @@
+import logging
+from bisect import bisect_left, insort
 from functools import cmp_to_key
 
+from classes.interval import IntervalIndex
 from classes.timeoff import TimeOff, compare_timeoff
 from settings.config import (
     Seniority, ExpectedHours, Locations, ExpectedNights, ExpectedWeekends,
     MAX_CONSECUTIVE_NIGHT_SHIFTS, MAX_CONSECUTIVE_WEEKEND_SHIFTS
 )
 
+logger = logging.getLogger(__name__)
+
+
+def requested_timeoff_problem(name, half_block, requested_timeoff):
+    """
+    The first rule a doctor's requested time-off, sorted by start, breaks for
+    their half block ('1', '2' or 'both'), or None.
+    """
+    if half_block in ["1", "2"]:
+        if len(requested_timeoff) > 1:
+            return f"{name} requested {len(requested_timeoff)} times-off but must choose at most 1 for a half block"
+        if requested_timeoff and requested_timeoff[0].duration > 48:
+            return f"{name} requested {requested_timeoff[0].duration} hours off, but must be less than or equal to 48 hours for a half block"
+        if requested_timeoff and half_block == "1" and requested_timeoff[0].start_day > 14:
+            return f"{name} requested day {requested_timeoff[0].start_day} off, but is on for first half of the block"
+        if requested_timeoff and half_block == "2" and requested_timeoff[0].start_day < 15:
+            return f"{name} requested day {requested_timeoff[0].start_day} off, but is on for the second half of the block"
+    else:
+        if len(requested_timeoff) > 2:
+            return f"{name} requested {len(requested_timeoff)} times-off but must choose at most 2 for a full block"
+        if len(requested_timeoff) == 2:
+            shorter = requested_timeoff[0].duration
+            longer = requested_timeoff[1].duration
+            if shorter > 12:
+                return f"{name} requested {shorter} hours off, but must be less than 12 hours for the shorter request"
+            if longer > 72:
+                return f"{name} requested {longer} hours off, but must be less than 72 hours for the longer request"
+        elif len(requested_timeoff) == 1 and requested_timeoff[0].duration > 72:
+            return f"{name} requested {requested_timeoff[0].duration} hours off, but must be less than 72 hours"
+    return None
+
+
+def start_of(shift):
+    return shift.start
+
+
+def is_night(shift):
+    return shift.night
+
+
+def is_weekend(shift):
+    return shift.weekend
+
 
 class Doctor:
+    __slots__ = (
+        'block', 'name', 'seniority', 'chief', 'carry_hours', 'half_block', 'pre_block_hours',
+        'weekly_hours', 'requested_timeoff', 'mandatory_timeoff', 'timeoff_index',
+        'expected_hours', 'expected_night_range', 'expected_weekend_range',
+        'actual_hours', 'actual_nights', 'actual_weekends', 'actual_shifts',
+        'consecutive_weekend_shifts', 'consecutive_night_shifts', 'location_hours', 'shifts', 'timeline', 'trail', 'blocked',
+    )
+
     def __init__(self,
                  block,
                  name,
@@ -44,24 +98,9 @@ class Doctor:
 
         assert chief in ["no", "yes"], f"Chief for {name} is {chief}, but must be 'Yes' or 'No'"
         assert half_block in ["1", "2", "both"], f"Half block for {name} is {half_block}, but must be '1', '2', or 'Both'"
-        if half_block in ["1", "2"]:
-            assert len(requested_timeoff) <= 1, f"{name} requested {len(requested_timeoff)} times-off but must choose at most 1 for a half block"
-            assert requested_timeoff[0].duration <= 48, f"{name} requested {requested_timeoff[0].duration} hours off, but must be less than or equal to 48 hours for a half block"
-            if half_block == "1":
-                assert requested_timeoff[0].start_day <= 14, f"{name} requested day {requested_timeoff[0].start_day} off, but is on for first half of the block"
-            else:
-                assert 15 <= requested_timeoff[0].start_day, f"{name} requested day {requested_timeoff[0].start_day} off, but is on for the second half of the block"
-        if half_block == "both":
-            assert len(requested_timeoff) <= 2, f"{name} requested {len(requested_timeoff)} times-off but must choose at most 2 for a full block"
-            requested_timeoff.sort(key=cmp_to_key(compare_timeoff))
-            if len(requested_timeoff) == 2:
-                shorter = requested_timeoff[0].duration
-                longer = requested_timeoff[1].duration
-                assert shorter <= 12, f"{name} requested {shorter} hours off, but must be less than 12 hours for the shorter request"
-                assert longer <= 72, f"{name} requested {longer} hours off, but must be less than 72 hours for the longer request"
-            elif len(requested_timeoff) == 1:
-                duration = requested_timeoff[0].duration
-                assert duration <= 72, f"{name} requested {duration} hours off, but must be less than 72 hours"
+        requested_timeoff.sort(key=cmp_to_key(compare_timeoff))
+        problem = requested_timeoff_problem(name, half_block, requested_timeoff)
+        assert problem is None, problem
 
         assert 0 <= pre_block_hours, f"Pre-block hours worked for this week by {name} is {pre_block_hours}, but must be non-negative"
 
@@ -69,10 +108,13 @@ class Doctor:
         carry_hours *= -1
         assert carry_hours >= pre_block_hours, f"{name} worked {pre_block_hours} this week before the block started, so there minimum carried hours should be at least this large, found {carry_hours}"
 
-        # Only use pre_block_hours if they are working the first half
-        weekly_hours = [pre_block_hours]
+        # Hours worked in each week of the block, pre-block hours count towards
+        # the first week they work
+        weekly_hours = [0] * block.num_weeks()
         if half_block == "2":
-            weekly_hours = [0]
+            weekly_hours[block.week(block.hour(15, 7))] = pre_block_hours
+        else:
+            weekly_hours[0] = pre_block_hours
 
         self.block = block
         self.name = name
@@ -84,17 +126,13 @@ class Doctor:
         self.weekly_hours = weekly_hours
         self.requested_timeoff = requested_timeoff
         self.mandatory_timeoff = mandatory_timeoff
+        self.timeoff_index = IntervalIndex()
+        for timeoff in mandatory_timeoff:
+            self.timeoff_index.push(timeoff.start, timeoff.end)
         self.expected_hours = self.calculate_expected_hours()
         self.expected_night_range = self.calculate_expected_night_shift_range()
         self.expected_weekend_range = self.calculate_expected_weekend_shift_range()
-        self.actual_hours = carry_hours  # TODO: confirm that only carry is used for total hours worked
-        self.actual_nights = 0
-        self.actual_weekends = 0
-        self.actual_shifts = 0
-        self.consecutive_weekend_shifts = 0
-        self.consecutive_night_shifts = 0
-        self.location_hours = {location: 0 for location in Locations}
-        self.shifts = []
+        self.reset_assignments()
 
         # Add Wednesday conference for EM residents
         if not Seniority(seniority) == Seniority.OFF_SERVICE:
@@ -102,12 +140,32 @@ class Doctor:
                 if day % 7 == 3 and self.working_on_day(day):
                     self.add_mandatory_time_off(day, 7, 8)
 
-        print(f'Creating {self}')
+        logger.debug('Creating %s', self)
+
+    def reset_assignments(self):
+        """
+        Counters for a doctor with no shifts assigned, also used by the
+        compiled inputs, which build doctors without the constructor.
+        """
+        self.actual_hours = self.carry_hours  # TODO: confirm that only carry is used for total hours worked
+        self.actual_nights = 0
+        self.actual_weekends = 0
+        self.actual_shifts = 0
+        self.consecutive_weekend_shifts = 0
+        self.consecutive_night_shifts = 0
+        self.location_hours = dict.fromkeys(Locations, 0)
+        self.shifts = []
+        # Assigned shifts in start order, shifts is in the order they were assigned
+        self.timeline = []
+        # Strings each add_shift overwrote, restored by remove_shift
+        self.trail = []
+        # How many assigned shifts conflict with each shift, by shift index
+        self.blocked = {}
 
     def __repr__(self):
-        attrs = vars(self)
         msg = "Doctor "
-        msg += ', '.join(f"{key}:{value}" for key, value in attrs.items())
+        # Blocked shifts follow from the assigned shifts
+        msg += ', '.join(f"{key}:{getattr(self, key)}" for key in self.__slots__ if key != 'blocked')
         return msg
 
     def get_start_day(self):
@@ -163,18 +221,43 @@ class Doctor:
         This should be called by any doctor after they are assigned a shift
         """
         timeoff = TimeOff(self.block, self.name, start_day, start_time, duration, mandatory=True)
+        self.push_mandatory_timeoff(timeoff)
+
+    def push_mandatory_timeoff(self, timeoff):
         self.mandatory_timeoff.append(timeoff)
+        self.timeoff_index.push(timeoff.start, timeoff.end)
 
     def remove_mandatory_timeoff(self):
         assert len(self.mandatory_timeoff) > 0, f"Mandatory timeoff cannot be removed from {self.name}, None exist"
         self.mandatory_timeoff.pop()
+        self.timeoff_index.pop()
+
+    def is_on_timeoff(self, shift):
+        """
+        True if the shift overlaps any of the doctor's mandatory time-off, or
+        conflicts with a shift they are assigned.
+        """
+        return shift.index in self.blocked or self.timeoff_index.overlaps(shift.start, shift.end)
 
-    def worked_weekly_max_hours(self):
+    def resting_after(self, hour):
+        """
+        Ends of the rest after assigned shifts that still run at hour.
+        """
+        ends = []
+        for shift in reversed(self.shifts):
+            # Shifts and their rest are at most 12 hours each
+            if shift.start + 24 <= hour:
+                break
+            if shift.end + shift.duration > hour:
+                ends.append(shift.end + shift.duration)
+        return tuple(ends)
+
+    def worked_weekly_max_hours(self, week):
         """
         This should return True if they worked 60 hours from the previous Sunday
         to next Sunday (carried hours should be added if its the first week)
         """
-        return bool(60 <= self.weekly_hours[-1])
+        return bool(60 <= self.weekly_hours[week])
 
     def received_weekly_break(self):
         # TODO: write this if it is a problem that people aren't getting breaks
@@ -184,118 +267,93 @@ class Doctor:
         """
         pass
 
-    def overlaps_second_block(self, day):
-        """
-        Check if the first day of the week overlaps with the second block
-        (day 15).
-        """
-        return bool(day == 15)
-
-    def reset_weekly_hours(self, day):
-        """
-        Reset when shift starts on Sunday 7am signifying the new week.
-        Track each weeks weekly hours to allow for backtracking.
-        If newest week overlaps with second block (day 15), override weekly
-        hours.
-        """
-        hours = 0
-        if self.overlaps_second_block(day):
-            hours = self.pre_block_hours
-
-        self.weekly_hours.append(hours)
-
-    def undo_reset_weekly_hours(self):
+    def count_string(self, shift, in_string):
         """
-        Remove this current weeks weekly hours when backtracking.
+        Assigned shifts in a row just before and just after shift, in start
+        order, that in_string is True for.
         """
-        assert len(self.weekly_hours) > 0, f"Weekly hours cannot be removed from {self.name}, None exist"
-        self.weekly_hours.pop()
-
-    def calculate_consecutive_nights(self):
-        """
-        When backtracking, consecutive nights need to be recalculated using the
-        doctors shifts. This is because removing a day that occurs after a
-        string of nights tells you consecutive nights can be reset to zero. But
-        removing a night that occurs after a string of days does not tell you
-        how many nights occur before this.
-
-        """
-        consecutive_nights = 0
-        for shift in reversed(self.shifts):
-            if shift.night:
-                consecutive_nights += 1
-            else:
-                break
-        return consecutive_nights
-
-    def calculate_consecutive_weekends(self):
-        consecutive_weekend_shifts = 0
-        for shift in reversed(self.shifts):
-            if shift.weekend:
-                consecutive_weekend_shifts += 1
-            else:
-                break
-        return consecutive_weekend_shifts
+        i = bisect_left(self.timeline, shift.start, key=start_of)
+        count = 0
+        j = i - 1
+        while j >= 0 and in_string(self.timeline[j]):
+            count += 1
+            j -= 1
+        j = i
+        while j < len(self.timeline) and self.timeline[j] is shift:
+            j += 1
+        while j < len(self.timeline) and in_string(self.timeline[j]):
+            count += 1
+            j += 1
+        return count
 
     def add_shift(self, shift):
         # Add actual hours worked, nights, and weekend count by this shift
-        # Then add mandatory time off after the shift
+        # Then block the shifts it conflicts with
         # And hours by location
         # Save shift for doctor
+        self.trail.append((self.consecutive_night_shifts, self.consecutive_weekend_shifts))
         self.actual_shifts += 1
         self.actual_hours += shift.duration
-        self.weekly_hours[-1] += shift.duration
+        self.weekly_hours[shift.week] += shift.duration
         self.location_hours[shift.location] += shift.duration
         if shift.night:
             self.actual_nights += 1
-            self.consecutive_night_shifts += 1
-        else:
-            self.consecutive_night_shifts = 0
-
         if shift.weekend:
             self.actual_weekends += 1
-            self.consecutive_weekend_shifts += 1
-        else:
-            self.consecutive_weekend_shifts = 0
 
-        start_day = shift.start_day + (shift.start_time + shift.duration) // 24
-        start_time = shift.start_time + (shift.start_time + shift.duration) % 24
-        self.add_mandatory_time_off(start_day, start_time, shift.duration)
+        for other in shift.conflicts:
+            self.blocked[other] = self.blocked.get(other, 0) + 1
         self.shifts.append(shift)
+        insort(self.timeline, shift, key=start_of)
+
+        # Strings end at the doctor's last shift
+        if self.timeline[-1] is shift:
+            self.consecutive_night_shifts = self.consecutive_night_shifts + 1 if shift.night else 0
+            self.consecutive_weekend_shifts = self.consecutive_weekend_shifts + 1 if shift.weekend else 0
+        else:
+            # Assigned before the last shift, it may break the strings
+            last = self.timeline[-1]
+            self.consecutive_night_shifts = self.count_string(last, is_night) + last.night
+            self.consecutive_weekend_shifts = self.count_string(last, is_weekend) + last.weekend
 
     def remove_shift(self):
         assert len(self.shifts) > 0, f"Shift cannot be removed from {self.name}, None exist"
 
-        # TODO: test that popping a day that had a string of nights before sets consecutive nights properly
         shift = self.shifts.pop()
         self.actual_shifts -= 1
         self.actual_hours -= shift.duration
-        self.weekly_hours[-1] -= shift.duration
+        self.weekly_hours[shift.week] -= shift.duration
         self.location_hours[shift.location] -= shift.duration
 
-        # Note: You could calculate consecutive nights/weekends every time
-        # a shift is added or removed but this would be slower than incrementing
-        # and decrementing and only recalculating when you absolutely need to.
         if shift.night:
             self.actual_nights -= 1
-            self.consecutive_night_shifts -= 1
-        else:
-            # Cannot decrement or reset to zero, need to calculate using the shifts
-            self.consecutive_night_shifts = self.calculate_consecutive_nights()
-
         if shift.weekend:
             self.actual_weekends -= 1
-            self.consecutive_weekend_shifts -= 1
-        else:
-            # Cannot decrement or reset to zero, need to calculate using the shifts
-            self.consecutive_weekend_shifts = self.calculate_consecutive_weekends()
-
-        assert len(self.mandatory_timeoff) > 0, f"Mandatory timeoff cannot be removed from {self.name}, None exist"
-        self.mandatory_timeoff.pop() # TODO: check popping last does not have a corner case
-        # TODO: remove consecutive nights and weekends
+        # Strings cannot be decremented after a shift that broke them
+        self.consecutive_night_shifts, self.consecutive_weekend_shifts = self.trail.pop()
+
+        i = bisect_left(self.timeline, shift.start, key=start_of)
+        while self.timeline[i] is not shift:
+            i += 1
+        del self.timeline[i]
+
+        for other in shift.conflicts:
+            count = self.blocked[other] - 1
+            if count == 0:
+                del self.blocked[other]
+            else:
+                self.blocked[other] = count
 
-    def can_work_more_night_shifts(self):
-        if self.consecutive_night_shifts == MAX_CONSECUTIVE_NIGHT_SHIFTS:
+    def can_work_more_night_shifts(self, shift=None):
+        """
+        False if the doctor is at their night limit, or at the longest night
+        string before shift, or before their next shift if none is given.
+        """
+        consecutive = self.consecutive_night_shifts
+        if shift is not None and self.timeline and shift.start < self.timeline[-1].start:
+            # Between assigned shifts, it could join strings on both sides
+            consecutive = self.count_string(shift, is_night)
+        if consecutive >= MAX_CONSECUTIVE_NIGHT_SHIFTS:
             return False
         # Already reached upper boundary of nights
         if self.actual_nights == self.expected_night_range[1]:
@@ -303,8 +361,11 @@ class Doctor:
 
         return True
 
-    def can_work_more_weekend_shifts(self):
-        if self.consecutive_weekend_shifts == MAX_CONSECUTIVE_WEEKEND_SHIFTS:
+    def can_work_more_weekend_shifts(self, shift=None):
+        consecutive = self.consecutive_weekend_shifts
+        if shift is not None and self.timeline and shift.start < self.timeline[-1].start:
+            consecutive = self.count_string(shift, is_weekend)
+        if consecutive >= MAX_CONSECUTIVE_WEEKEND_SHIFTS:
             return False
         # Already reached upper boundary of weekends
         if self.actual_weekends == self.expected_weekend_range[1]:
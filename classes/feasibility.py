@@ -0,0 +1,204 @@
+from collections import deque
+
+from settings.config import Seniority
+
+
+class FlowNetwork:
+    """
+    Max flow by shortest augmenting paths (Edmonds-Karp). The networks built
+    here have a node per shift and per day or week and seniority, so they
+    stay small.
+    """
+    def __init__(self):
+        self.capacity = {}
+        self.edges = {}
+
+    def add_edge(self, start, end, capacity):
+        self.edges.setdefault(start, []).append(end)
+        self.edges.setdefault(end, []).append(start)
+        self.capacity[start, end] = self.capacity.get((start, end), 0) + capacity
+        self.capacity.setdefault((end, start), 0)
+
+    def augment(self, path):
+        """
+        Push as much flow as fits along a path of nodes. Returns the amount.
+        """
+        edges = list(zip(path, path[1:]))
+        bottleneck = min(self.capacity[edge] for edge in edges)
+        for start, end in edges:
+            self.capacity[start, end] -= bottleneck
+            self.capacity[end, start] += bottleneck
+        return bottleneck
+
+    def max_flow(self, source, sink, flow=0):
+        """
+        Flow from source to sink, on top of flow already pushed.
+        """
+        while True:
+            parents = {source: None}
+            queue = deque([source])
+            while queue and sink not in parents:
+                node = queue.popleft()
+                for other in self.edges.get(node, []):
+                    if other not in parents and self.capacity[node, other] > 0:
+                        parents[other] = node
+                        queue.append(other)
+            if sink not in parents:
+                return flow
+
+            path = [sink]
+            while parents[path[-1]] is not None:
+                path.append(parents[path[-1]])
+            flow += self.augment(path[::-1])
+
+
+class Shortage:
+    """
+    A shift that cannot be filled, because the doctors of its preferred
+    seniorities run out of the resource kind.
+    """
+    def __init__(self, kind, shift):
+        self.kind = kind
+        self.shift = shift
+
+    def __repr__(self):
+        seniorities = ', '.join(Seniority(value).name for value in self.shift.position_preferences)
+        return (f"Day {self.shift.start_day} {self.shift.location} at {self.shift.start_time}:00 "
+                f"is short of {self.kind} for {seniorities}")
+
+
+def most_shifts(shifts):
+    """
+    Most of the shifts one doctor can work, taking each shift that frees
+    them up soonest after its rest.
+    """
+    count = 0
+    free = None
+    for shift in sorted(shifts, key=lambda shift: shift.end + shift.duration):
+        if free is None or shift.start >= free:
+            count += 1
+            free = shift.end + shift.duration
+    return count
+
+
+def limit(upper):
+    """
+    The most nights or weekends search lets a doctor work. It stops at the
+    upper bound, which a fractional bound is never equal to.
+    """
+    return int(upper) if upper == int(upper) else None
+
+
+def find_shortages(kind, shifts, supply, takers, pools=None):
+    """
+    Route shifts to the (group, seniority) supply that can fill them.
+    supply maps a group to {seniority: capacity}, takers holds the
+    (shift, seniority) pairs some doctor could fill and pools optionally
+    bounds each seniority across groups. Returns the shifts left without a
+    doctor.
+    """
+    network = FlowNetwork()
+    for group, capacities in supply.items():
+        for seniority, capacity in capacities.items():
+            if pools is not None and pools.get(seniority) is not None:
+                network.add_edge(('pool', seniority), ('supply', group, seniority), capacity)
+            else:
+                network.add_edge('source', ('supply', group, seniority), capacity)
+    if pools is not None:
+        for seniority, capacity in pools.items():
+            if capacity is not None:
+                network.add_edge('source', ('pool', seniority), capacity)
+
+    demand = 0
+    routes = []
+    for i, (group, shift, amount) in enumerate(shifts):
+        for seniority in shift.position_preferences:
+            if (shift, seniority) in takers and seniority in supply.get(group, {}):
+                network.add_edge(('supply', group, seniority), ('shift', i), amount)
+                head = ['source', ('pool', seniority)] if pools is not None and pools.get(seniority) is not None \
+                    else ['source']
+                routes.append(head + [('supply', group, seniority), ('shift', i), 'sink'])
+        network.add_edge(('shift', i), 'sink', amount)
+        demand += amount
+
+    # Most shifts fit on their first route, only the rest need a search
+    flow = sum(network.augment(route) for route in routes)
+    if network.max_flow('source', 'sink', flow) == demand:
+        return []
+    # Unfilled shifts still have capacity left to the sink
+    return [Shortage(kind, shift) for i, (_, shift, _) in enumerate(shifts)
+            if network.capacity[('shift', i), 'sink'] > 0]
+
+
+def analyze(block, doctors, shifts):
+    """
+    Shortages that rule out any schedule, found before searching. Each check
+    relaxes the rules search enforces, so a shortage proves there is no
+    schedule, but no shortage does not prove there is one:
+
+    - doctors: on each day, a doctor can only fill shifts of their seniority
+      outside their time-off, at most as many as fit with the rest after
+      each shift
+    - nights, weekends: the same for night and weekend shifts, and a
+      seniority cannot work more than its doctors' night and weekend limits
+    - hours: a doctor works at most 60 hours in a week, including the hours
+      worked before the block
+
+    Expected hours are targets search does not enforce, so they are not used.
+    """
+    days = {}
+    for shift in shifts:
+        days.setdefault(shift.start_day, []).append(shift)
+
+    shortages = []
+    # Shifts each seniority has a doctor for, on the day and outside time-off
+    takers = set()
+    for kind, in_kind, pool_limit in [
+        ('doctors', lambda shift: True, None),
+        ('nights', lambda shift: shift.night, lambda doctor: limit(doctor.expected_night_range[1])),
+        ('weekends', lambda shift: shift.weekend, lambda doctor: limit(doctor.expected_weekend_range[1])),
+    ]:
+        supply = {}
+        pools = {} if pool_limit is not None else None
+        for doctor in doctors:
+            seniority = doctor.seniority.value
+            for day, day_shifts in days.items():
+                if not doctor.working_on_day(day):
+                    continue
+                workable = [shift for shift in day_shifts
+                            if in_kind(shift) and seniority in shift.position_preferences
+                            and not doctor.is_on_timeoff(shift)]
+                takers.update((shift, seniority) for shift in workable)
+                capacities = supply.setdefault(day, {})
+                capacities[seniority] = capacities.get(seniority, 0) + most_shifts(workable)
+            if pools is not None:
+                # One doctor without a limit leaves the seniority without one
+                doctor_limit = pool_limit(doctor)
+                if seniority not in pools:
+                    pools[seniority] = doctor_limit
+                elif pools[seniority] is not None:
+                    pools[seniority] = None if doctor_limit is None else pools[seniority] + doctor_limit
+
+        demand = [(shift.start_day, shift, 1) for shift in shifts if in_kind(shift)]
+        shortages.extend(find_shortages(kind, demand, supply, takers, pools))
+
+    supply = {}
+    for doctor in doctors:
+        capacities_by_week = {}
+        for day in range(doctor.get_start_day(), doctor.get_end_day() + 1):
+            week = block.week(block.hour(day, 7))
+            capacities_by_week[week] = 60 - doctor.weekly_hours[week]
+        for week, capacity in capacities_by_week.items():
+            capacities = supply.setdefault(week, {})
+            capacities[doctor.seniority.value] = capacities.get(doctor.seniority.value, 0) + max(capacity, 0)
+    demand = [(shift.week, shift, shift.duration) for shift in shifts]
+    shortages.extend(find_shortages('hours', demand, supply, takers))
+
+    # Name each shift once, by the first check it failed
+    short = set()
+    first_shortages = []
+    for shortage in shortages:
+        if shortage.shift not in short:
+            short.add(shortage.shift)
+            first_shortages.append(shortage)
+    return first_shortages
@@ -0,0 +1,120 @@
+from bisect import bisect_left, insort
+
+
+def day_time_duration_problem(block, label, start_day, start_time, duration):
+    """
+    The first rule a start day, start time and duration breaks within the
+    block, or None. Shared by shifts, time-off and input validation.
+    """
+    # Validate day
+    if not block.start <= start_day <= block.end:
+        return f"Start day for {label} is {start_day}, but must be between {block.start} and {block.end}"
+
+    # Validate start time
+    if not 0 <= start_time <= 23:
+        return f"Start time for {label} is {start_time}, but must be between 0 and 23"
+    if start_day == block.start and start_time < 7:
+        return f"Start time for {label} is {start_time}, but must be after 7am for the first day"
+
+    # Validate duration
+    if duration <= 0:
+        return f"Duration for {label} is {duration}, but must be positive"
+
+    # Days start at 7am, so you just need to end at or before 7am the day after last
+    if block.hour(start_day, start_time) + duration > block.hour(block.end + 1, 7):
+        return f"End for {label} is {duration} hours after day {start_day} at {start_time}, but must be before 7am if it extends past the last day"
+    return None
+
+
+def check_day_time_duration(block, label, start_day, start_time, duration):
+    """
+    Validate a start day, start time and duration within the block, shared by
+    shifts and time-off. Returns the absolute start hour.
+    """
+    # Validate types
+    assert type(start_day) == int, f"Start day for {label} is {start_day}, but must be an integer"
+    assert type(start_time) == int, f"Start time for {label} is {start_time}, but must be an integer"
+    assert type(duration) == int, f"Duration for {label} is {duration}, but must be an integer"
+
+    problem = day_time_duration_problem(block, label, start_day, start_time, duration)
+    assert problem is None, problem
+
+    return block.hour(start_day, start_time)
+
+
+class Interval:
+    """
+    Absolute [start, end) block hours and the block week they start in,
+    computed once when a shift or time-off is created so every overlap,
+    rest-period and weekly check is an integer comparison.
+    """
+    __slots__ = ('_start', '_end', '_week')
+
+    def __init__(self, block, start, duration):
+        self._start = start
+        self._end = start + duration
+        self._week = block.week(start)
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def end(self):
+        return self._end
+
+    @property
+    def week(self):
+        return self._week
+
+    def overlaps(self, other):
+        return self._start < other.end and other.start < self._end
+
+
+class IntervalIndex:
+    """
+    Half-open [start, end) intervals in absolute block hours kept sorted by
+    start. Every interval that overlaps a query starts no earlier than the
+    longest interval before the query start, so a query bisects to that
+    window instead of scanning every interval.
+
+    Intervals are removed in the reverse order they were pushed, matching how
+    mandatory time-off is added and removed while backtracking.
+    """
+    def __init__(self, intervals=()):
+        # Intervals given in the order they were pushed
+        self.pushed = list(intervals)
+        self.intervals = sorted(self.pushed)
+        self.longest = max((end - start for start, end in self.pushed), default=0)
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def push(self, start, end):
+        assert start < end, f"Interval is [{start}, {end}), but must end after it starts"
+        interval = (start, end)
+        insort(self.intervals, interval)
+        self.pushed.append(interval)
+        # Never shrinks when popping, a larger window only scans a few more intervals
+        self.longest = max(self.longest, end - start)
+
+    def pop(self):
+        assert len(self.pushed) > 0, f"Interval cannot be removed, None exist"
+        interval = self.pushed.pop()
+        del self.intervals[bisect_left(self.intervals, interval)]
+        return interval
+
+    def ending_after(self, hour):
+        """
+        Intervals still running at or starting after hour, in start order.
+        """
+        lo = bisect_left(self.intervals, (hour - self.longest + 1,))
+        return tuple(interval for interval in self.intervals[lo:] if hour < interval[1])
+
+    def overlaps(self, start, end):
+        lo = bisect_left(self.intervals, (start - self.longest + 1,))
+        hi = bisect_left(self.intervals, (end,))
+        for i in range(lo, hi):
+            if start < self.intervals[i][1]:
+                return True
+        return False
@@ -0,0 +1,22 @@
+"""
+Logging for the scheduler. Modules log through logging.getLogger(__name__)
+with %-style arguments, so a message is only formatted if it is emitted.
+Until configure() is called only warnings are shown.
+
+Levels: WARNING for inputs that rule out a schedule, INFO for search
+results, DEBUG for objects as they are created and TRACE for every
+assignment and backtrack.
+"""
+import logging
+
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+
+def configure(level='WARNING'):
+    """
+    Log to stderr from level, a level name such as 'TRACE' or a number.
+    """
+    if isinstance(level, str):
+        level = level.upper()
+    logging.basicConfig(level=level, format='%(levelname)s %(name)s: %(message)s')
@@ -0,0 +1,48 @@
+from collections import OrderedDict
+from hashlib import blake2b
+
+
+class NogoodStore:
+    """
+    Hashes of search states proven to have no schedule, evicting the least
+    recently used once max_entries is reached. Each entry is a 16 byte digest
+    and costs roughly 150 bytes including the dictionary overhead.
+    """
+    def __init__(self, max_entries=100000):
+        assert max_entries > 0, f"Nogood store size is {max_entries}, but must be positive"
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def digest(state):
+        return blake2b(repr(state).encode(), digest_size=16).digest()
+
+    def contains(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, key):
+        self.entries[key] = None
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,177 @@
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import time
+
+from classes.control import RunControl
+from classes.schedule import Schedule
+
+logger = logging.getLogger(__name__)
+
+# How long to wait for a report before checking whether workers died
+POLL_SECONDS = 1.0
+# Nodes each worker searches in the first round, doubled every round after
+ROUND_NODES = 1000
+
+
+def run_worker(index, seed, block, doctors, shifts, options, control, results):
+    start = time.perf_counter()
+    report = {'worker': index, 'seed': seed, 'assignments': None}
+    try:
+        schedule = Schedule(block, doctors, shifts, seed=seed, control=control, **options)
+    except Exception as e:
+        # Always report, the main process waits for every worker
+        report.update(status='failed', error=repr(e), seconds=time.perf_counter() - start)
+        results.put(report)
+        return
+
+    if schedule.schedule is not None:
+        status = 'complete'
+    elif schedule.stopped:
+        status = 'stopped'
+    else:
+        status = 'impossible'
+    report.update(
+        status=status,
+        nodes=schedule.nodes,
+        backjumps=schedule.backjumps,
+        seconds=time.perf_counter() - start,
+        assignments=schedule.assignments() if status == 'complete' else None,
+    )
+    results.put(report)
+
+
+class Portfolio:
+    """
+    Race one search per worker process, each breaking ties between doctors
+    with its own seed. The winning assignments are replayed onto doctors and
+    shifts in this process, so they end up as if Schedule found them here.
+
+    Workers search in rounds. Each round, every worker still searching starts
+    over from its seed with a budget of nodes, round_nodes at first and
+    doubled every round, and the first worker by index to complete within a
+    round wins. So the same seed always picks the same winner, and no worker
+    waits on one stuck behind unlucky ties for longer than a round. Workers
+    after a complete schedule are stopped within its round. A worker that
+    dies without reporting, killed for memory for example, is reported as
+    failed instead of waited on. A worker that exhausts its search proves
+    there is no schedule, so the others are stopped and impossible is set.
+    A node_limit caps the nodes each worker searches across all its rounds.
+
+    stats holds each worker's report from the last round it searched in.
+    """
+    def __init__(self, block, doctors, shifts, workers=None, seed=0, round_nodes=ROUND_NODES, **options):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        assert workers > 0, f"Portfolio workers is {workers}, but must be positive"
+        assert round_nodes > 0, f"Portfolio round nodes is {round_nodes}, but must be positive"
+
+        rng = random.Random(seed)
+        self.seeds = [rng.randrange(2 ** 32) for _ in range(workers)]
+
+        # Limits apply to the portfolio, rounds get what is left of them.
+        # Workers stop on events of their own and their stats stay with them.
+        node_limit = options.pop('node_limit', None)
+        control = options.pop('control', None)
+        assert control is None or (control.stop is None and control.checkpoint is None and not control.stats), \
+            "Portfolio control can only set a time limit"
+        time_limit = control.time_limit if control is not None else None
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+        self.stats = [None] * workers
+        self.winner = None
+        self.impossible = False
+        self.rounds = 0
+        budget = round_nodes
+        used = 0
+        searching = list(range(workers))
+        while searching and self.winner is None:
+            limit = budget if node_limit is None else min(budget, node_limit - used)
+            round_options = dict(options, node_limit=limit)
+            round_time = None
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    break
+                round_time = deadline - time.perf_counter()
+
+            self.rounds += 1
+            reports = self.run_round(block, doctors, shifts, searching, round_options, round_time)
+            if any(reports[index]['status'] == 'impossible' for index in searching):
+                # Every worker searches the same tree, so one exhausting it is proof enough
+                self.impossible = True
+                break
+            self.winner = min((index for index in searching if reports[index]['status'] == 'complete'), default=None)
+            used += limit
+            # Workers stopped by anything but the round's budget are done
+            searching = [index for index in searching
+                         if reports[index]['status'] == 'stopped' and reports[index]['nodes'] == limit
+                         and used != node_limit]
+            budget *= 2
+
+        prefix = self.stats[self.winner]['assignments'] if self.winner is not None else None
+        if self.impossible:
+            logger.info('Portfolio proved there is no schedule')
+            self.schedule = None
+        elif prefix is None:
+            logger.info('Portfolio found no schedule')
+            self.schedule = None
+        else:
+            logger.info('Portfolio won by worker %d with seed %d in round %d', self.winner,
+                        self.seeds[self.winner], self.rounds)
+            self.schedule = Schedule(block, doctors, shifts, prefix=prefix, **options).schedule
+
+    def run_round(self, block, doctors, shifts, searching, options, time_limit):
+        """
+        Search from each worker's seed, returning their reports by worker.
+        """
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        stops = {index: context.Event() for index in searching}
+        processes = {
+            index: context.Process(target=run_worker, args=(index, self.seeds[index], block, doctors, shifts, options,
+                                                            RunControl(time_limit=time_limit, stop=stops[index]),
+                                                            results))
+            for index in searching
+        }
+        for process in processes.values():
+            process.start()
+
+        reports = {}
+        dead = set()
+        while len(reports) < len(processes):
+            try:
+                result = results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                for index, process in processes.items():
+                    if index in reports or process.exitcode is None:
+                        continue
+                    if index in dead:
+                        # Exited a whole poll ago, its report would have arrived
+                        logger.warning('Portfolio worker %d exited with code %d without reporting',
+                                       index, process.exitcode)
+                        self.report(reports, stops, {'worker': index, 'seed': self.seeds[index], 'assignments': None,
+                                                     'status': 'failed', 'error': f'exit code {process.exitcode}'})
+                    else:
+                        dead.add(index)
+                continue
+            self.report(reports, stops, result)
+        for process in processes.values():
+            process.join()
+        return reports
+
+    def report(self, reports, stops, result):
+        index = result['worker']
+        result['round'] = self.rounds
+        reports[index] = result
+        self.stats[index] = result
+        if result['status'] == 'complete':
+            # Only workers before this one can still win the round
+            for other, stop in stops.items():
+                if other > index:
+                    stop.set()
+        elif result['status'] == 'impossible':
+            # Nobody can win the round
+            for stop in stops.values():
+                stop.set()
@@ -0,0 +1,78 @@
+import logging
+import random
+import time
+
+from classes.schedule import Schedule
+
+logger = logging.getLogger(__name__)
+
+
+def luby(i):
+    """
+    The i-th (from 1) term of the Luby sequence: 1, 1, 2, 1, 1, 2, 4, 1, ...
+    """
+    assert i > 0, f"Luby term is {i}, but must be positive"
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while i != (1 << k) - 1:
+        # Terms after 2^(k-1) - 1 repeat the sequence from its start
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class Restarts:
+    """
+    Search again from scratch whenever an attempt uses up its backtracks.
+    Each attempt picks randomly among near-tied doctors, so a restart leaves
+    the part of the tree the last one got stuck in. Budgets are base times
+    the Luby sequence, or base times factor to the attempt with geometric
+    cutoffs.
+
+    Attempt seeds come from seed, so the same seed repeats the same attempts.
+    An attempt that runs out of doctors within its budget proves no schedule
+    exists and ends the restarts.
+    """
+    def __init__(self, block, doctors, shifts, seed=0, cutoffs='luby', base=100, factor=2, max_attempts=50,
+                 **options):
+        assert cutoffs in ['luby', 'geometric'], f"Restart cutoffs is {cutoffs}, but must be luby or geometric"
+        assert base > 0, f"Restart base is {base}, but must be positive"
+        assert max_attempts > 0, f"Restart max_attempts is {max_attempts}, but must be positive"
+
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        self.attempts = []
+        self.schedule = None
+        self.exhausted = False
+        for attempt in range(max_attempts):
+            budget = base * luby(attempt + 1) if cutoffs == 'luby' else int(base * factor ** attempt)
+            attempt_seed = rng.randrange(2 ** 32)
+            attempt_start = time.perf_counter()
+            schedule = Schedule(block, doctors, shifts, rng=random.Random(attempt_seed), backtrack_limit=budget,
+                                **options)
+            if schedule.schedule is not None:
+                status = 'complete'
+            elif schedule.stopped:
+                status = 'stopped'
+            else:
+                status = 'impossible'
+            self.attempts.append({
+                'seed': attempt_seed,
+                'budget': budget,
+                'status': status,
+                'nodes': schedule.nodes,
+                'backtracks': schedule.backtracks,
+                'seconds': time.perf_counter() - attempt_start,
+            })
+            if status != 'stopped':
+                self.schedule = schedule.schedule
+                self.exhausted = status == 'impossible'
+                break
+        self.seconds = time.perf_counter() - start
+
+        backtracks = [stats['backtracks'] for stats in self.attempts]
+        logger.info('Restarts made %d attempts in %.2fs, backtracks per attempt %s', len(self.attempts), self.seconds,
+                    backtracks)
@@ -1,10 +1,24 @@
+import logging
+import random
+import time
 from functools import cmp_to_key
 
-from classes.shift import compare_shifts
-global_shift = None
+from classes.bitset import BitsetTable
+from classes.checkpoint import Checkpoint
+from classes.control import RunControl
+from classes.feasibility import analyze
+from classes.log import TRACE
+from classes.nogood import NogoodStore
+from classes.shift import compare_shifts, link_conflicts
+from classes.stats import SearchStats
+from classes.table import DoctorTable
 
+logger = logging.getLogger(__name__)
 
-def compare_doctors(doctor1, doctor2):
+
+def compare_doctors(doctor1, doctor2, shift):
+    # Ranking reference, the search sorts by rank_doctor which orders doctors
+    # the same way without calling back into Python per comparison.
     # Order: Front-Back is Last-First so the doctor at the back of the list
     # should be chosen first
 
@@ -21,10 +35,10 @@ def compare_doctors(doctor1, doctor2):
     wants_timeoff1 = False
     wants_timeoff2 = False
     for timeoff1 in doctor1.requested_timeoff:
-        if global_shift.overlaps_timeoff(timeoff1):
+        if shift.overlaps_timeoff(timeoff1):
             wants_timeoff1 = True
     for timeoff2 in doctor2.requested_timeoff:
-        if global_shift.overlaps_timeoff(timeoff2):
+        if shift.overlaps_timeoff(timeoff2):
             wants_timeoff2 = True
     if wants_timeoff1 and not wants_timeoff2:
         return -1
@@ -46,12 +60,6 @@ def compare_doctors(doctor1, doctor2):
     elif doctor1.consecutive_weekend_shifts > doctor2.consecutive_weekend_shifts:
         return 1
 
-    # TODO: doctors who are mid weekend/night shift are sorted higher
-    if doctor1.string_nights < doctor2.string_nights:
-        return -1
-    elif doctor1.string_nights > doctor2.string_nights:
-        return 1
-
     # Amount of weekends, upper bound
     weekends_needed1 = doctor1.expected_weekend_range[1] - doctor1.actual_weekends
     weekends_needed2 = doctor2.expected_weekend_range[1] - doctor2.actual_weekends
@@ -69,15 +77,14 @@ def compare_doctors(doctor1, doctor2):
         return 1
 
     # Preference for seniority
-    position_preferences = global_shift.position_preferences
+    position_preferences = shift.position_preferences
     seniority_index1 = -1
-    for i, seniority in position_preferences:
-        # TODO: test that this compares properly
-        if seniority == doctor1.seniority:
+    for i, seniority in enumerate(position_preferences):
+        if seniority == doctor1.seniority.value:
             seniority_index1 = i
     seniority_index2 = -1
-    for j, seniority, in position_preferences:
-        if seniority == doctor2.seniority:
+    for j, seniority in enumerate(position_preferences):
+        if seniority == doctor2.seniority.value:
             seniority_index2 = j
     assert seniority_index1 != -1, f"Preferences for shift are {position_preferences}, but doctor1 seniority is {doctor1.seniority}"
     assert seniority_index2 != -1, f"Preferences for shift are {position_preferences}, but doctor2 seniority is {doctor2.seniority}"
@@ -96,8 +103,8 @@ def compare_doctors(doctor1, doctor2):
         return 1
 
     # Location hours, less location hours should be prioritized
-    location_hours1 = doctor1.location_hours[global_shift.location]
-    location_hours2 = doctor2.location_hours[global_shift.location]
+    location_hours1 = doctor1.location_hours[shift.location]
+    location_hours2 = doctor2.location_hours[shift.location]
     if location_hours1 > location_hours2:
         return -1
     elif location_hours1 < location_hours2:
@@ -107,93 +114,756 @@ def compare_doctors(doctor1, doctor2):
     return 0
 
 
+def rank_doctor(doctor, shift):
+    """
+    Sort key for a doctor on a shift, larger ranks are chosen first. Orders
+    doctors exactly like compare_doctors.
+    """
+    wants_timeoff = False
+    for timeoff in doctor.requested_timeoff:
+        if shift.overlaps_timeoff(timeoff):
+            wants_timeoff = True
+
+    # Smaller preference index represents higher priority
+    return (
+        not wants_timeoff,
+        doctor.consecutive_night_shifts,
+        doctor.consecutive_weekend_shifts,
+        doctor.expected_weekend_range[1] - doctor.actual_weekends,
+        doctor.expected_night_range[1] - doctor.actual_nights,
+        -shift.position_preferences.index(doctor.seniority.value),
+        doctor.expected_hours - doctor.actual_hours,
+        -doctor.location_hours[shift.location],
+    )
+
+
+# Doctors whose ranks agree up to the hours they need are near-tied, and a
+# random one of them is chosen when search has a random number generator
+NEAR_TIE_KEYS = 6
+
+# mrv chooses among the unfilled shifts starting within this many hours of
+# the earliest one. Night and weekend strings only break on a shift that is
+# not a night (weekend), so filling every scarce night in the block before the
+# days between them runs doctors into their string limits, while a few days
+# ahead is still enough to find the scarce shifts no doctor is left for.
+MRV_HORIZON_HOURS = 72
+
+
+class SearchFrame:
+    """
+    A decision point of the search: the shift at index i, the doctors left
+    to try for it and the doctor that is currently assigned. The doctors are
+    only sorted (best at the back) once the best one has been backtracked.
+    """
+    def __init__(self, i, doctors):
+        self.i = i
+        self.doctors = doctors
+        self.ranked = False
+        self.doctor = None
+        # Future shifts the assigned doctor was pruned from when propagating
+        self.pruned = []
+        # Earlier shifts whose assignments ruled doctors out when backjumping,
+        # or every earlier shift if the cause is unknown
+        self.conflicts = set()
+        self.chronological = False
+        # State digest to record as a nogood if every doctor fails
+        self.nogood = None
+        # Doctors that failed here, or were skipped as equivalent to one that
+        # did, and doctors skipped because they failed an identical shift
+        self.eliminated = []
+        self.excluded = set()
+        self.twin_key = None
+
+
 class Schedule:
-    def __init__(self, block, doctors, shifts):
+    def __init__(self, block, doctors, shifts, engine='python', propagate=False, backjump=False,
+                 nogood_limit=None, node_limit=None, seed=None, prefix=None, split_depth=None,
+                 order='chronological', check_feasibility=False, symmetry=False, rng=None,
+                 backtrack_limit=None, control=None):
+        """
+        Search starts as soon as the schedule is created. A seed shuffles the
+        order doctors are considered in, which breaks ties between equally
+        ranked doctors differently for each seed. A prefix of doctor indices,
+        one per shift in start order, is replayed before searching the
+        remaining shifts. With a split_depth, search collects
+        every way to fill the first split_depth shifts into prefixes instead
+        of finishing a schedule.
+
+        Shifts are filled in start order, or with order='mrv' the shift with
+        the fewest doctors left in its domain is filled next, the earliest if
+        tied. Ordering by mrv propagates domains as if propagate was set.
+        Shifts are then reordered in place as they are chosen and the
+        schedule lists them in the order they were filled.
+
+        With check_feasibility, shortages that rule out any schedule are
+        looked for first, and search only starts if there are none.
+
+        With symmetry, search skips assignments that only swap doctors who are
+        interchangeable, or that swap the doctors on identical shifts, of
+        ones that already failed. symmetry_skips counts the doctors skipped.
+
+        With an rng (random.Random), each shift gets a random doctor among the
+        near-tied best ones instead of the first. Search gives up after
+        backtrack_limit assignments have been undone. A search that gives up
+        undoes its assignments.
+
+        Search also gives up after node_limit nodes, or as its control
+        (a RunControl) says, which is checked every node since a node can
+        take milliseconds on large inputs. The deepest partial schedule
+        reached is kept as partial, (shift, doctor) pairs in the order they
+        were filled, with the shifts it leaves uncovered. A checkpoint is
+        removed once search completes or proves there is no schedule. With
+        stats, a SearchStats is kept as stats, otherwise stats is None.
+        """
+        if control is None:
+            control = RunControl()
+        checkpoint = control.checkpoint
+        assert engine in ['python', 'numpy', 'bitset'], f"Engine is {engine}, but must be 'python', 'numpy' or 'bitset'"
+        assert split_depth is None or split_depth > 0, f"Split depth is {split_depth}, but must be positive"
+        # A state whose prefixes were collected did not fail
+        assert split_depth is None or nogood_limit is None, "Nogoods cannot be used when splitting"
+        assert order in ['chronological', 'mrv'], f"Order is {order}, but must be 'chronological' or 'mrv'"
+        if order == 'mrv':
+            # Tables and nogood states assume shifts are filled in start order
+            assert engine == 'python', f"Engine is {engine}, but must be 'python' with order 'mrv'"
+            assert nogood_limit is None, "Nogoods cannot be used with order 'mrv'"
+        # Identical shifts skip doctors because of failures outside the state
+        assert not symmetry or nogood_limit is None, "Nogoods cannot be used with symmetry"
+        # Checkpoints keep the stack, not nogoods, identical shifts or random state
+        assert checkpoint is None or (nogood_limit is None and not symmetry and rng is None), \
+            "Checkpoints cannot be used with nogoods, symmetry or an rng"
+        assert checkpoint is None or (prefix is None and split_depth is None), \
+            "Checkpoints cannot be used with a prefix or split depth"
+
+        # Prefixes and results refer to doctors by their position in the input
+        self.doctors = doctors
+        if seed is not None:
+            doctors = list(doctors)
+            random.Random(seed).shuffle(doctors)
+
         # Sort shifts based on start time
         # TODO: filter out optional shifts
         shifts.sort(key=cmp_to_key(compare_shifts))
+        if any(shift.conflicts is None for shift in shifts):
+            link_conflicts(shifts)
+
+        # The numpy and bitset engines filter doctors from a table of their counters
+        self.table = None
+        if engine == 'numpy':
+            self.table = DoctorTable(doctors, shifts)
+        elif engine == 'bitset':
+            self.table = BitsetTable(doctors, shifts)
+
+        self.stats = SearchStats(len(shifts)) if control.stats else None
+        if self.stats is not None:
+            self.sort_doctors = self.stats.timed('sort', self.sort_doctors)
+            self.best_doctor = self.stats.timed('sort', self.best_doctor)
+            self.assign = self.stats.timed('assign', self.assign)
+            self.filter_available_doctors = self.stats.timed('filter', self.filter_available_doctors)
+            if self.table is not None:
+                self.table.filter_available_doctors = self.stats.timed('filter', self.table.filter_available_doctors)
+
+        # Propagation keeps the doctors that could still fill each shift, mrv
+        # counts them to choose the next shift
+        self.order = order
+        self.domains = self.initial_domains(doctors, shifts) if propagate or order == 'mrv' else None
+        # Backjumping tracks the shifts each doctor is assigned on the path
+        self.assigned = {doctor: [] for doctor in doctors} if backjump else None
+        self.backjumps = 0
+        # Nogoods remember states whose remaining shifts cannot be filled
+        self.nogoods = NogoodStore(nogood_limit) if nogood_limit is not None else None
+        # Frames on the stack for each kind of identical shift
+        self.twins = {} if symmetry else None
+        self.symmetry_skips = 0
+        self.nodes = 0
+        self.node_limit = node_limit
+        self.rng = rng
+        self.backtracks = 0
+        self.backtrack_limit = backtrack_limit
+        self.stop = control.stop
+        self.deadline = time.perf_counter() + control.time_limit if control.time_limit is not None else None
+        self.stopped = False
+        # Deepest partial schedule, saved before the first undo below it
+        self.depth = 0
+        self.partial = []
+        self.unsaved = False
+        # Checkpoints refer to shifts by start order and doctors by input position
+        self.checkpoint = Checkpoint(checkpoint) if checkpoint is not None else None
+        self.checkpoint_nodes = control.checkpoint_nodes
+        self.next_checkpoint = None
+        self.resumed = None
+        if self.checkpoint is not None:
+            self.shift_ids = {shift: k for k, shift in enumerate(shifts)}
+            self.positions = {doctor: position for position, doctor in enumerate(self.doctors)}
+            self.next_checkpoint = control.checkpoint_nodes
+            if control.resume:
+                self.resumed = self.checkpoint.load()
+        self.prefix = prefix if prefix is not None else []
+        self.split_depth = min(split_depth, len(shifts)) if split_depth is not None else None
+        self.prefixes = []
+        self.shortages = analyze(block, doctors, shifts) if check_feasibility else []
+        for shortage in self.shortages:
+            logger.warning('Schedule Impossible, %s', shortage)
         curr_schedule = []
-        self.schedule = self.search(doctors, shifts, 0, curr_schedule)
+        self.schedule = self.search(doctors, shifts, 0, curr_schedule) if not self.shortages else None
+        if self.unsaved:
+            self.save_partial(curr_schedule)
+        if self.checkpoint is not None and not self.stopped:
+            self.checkpoint.remove()
+        if self.stats is not None:
+            self.stats.nodes = self.nodes
+            self.stats.shifts = list(shifts)
+        filled = {shift for shift, _ in self.partial}
+        self.uncovered = [shift for shift in shifts if shift not in filled]
 
     def search(self, doctors, shifts, i, curr_schedule):
-        if len(shifts) == i:
-            print('Schedule Complete!!!')
-            return curr_schedule
+        """
+        Fill shifts[i:] in order, choosing a doctor for each shift and
+        backtracking to the next best doctor when a later shift cannot be
+        filled. Decisions are kept on an explicit stack of frames rather than
+        the call stack, so the number of shifts is not bounded by the
+        recursion limit.
+        """
+        if self.domains is not None and not all(self.domains[shift] for shift in shifts[i:]):
+            logger.info('Schedule Impossible, a shift has no available doctors')
+            return None
+
+        stack = []
+        descend = True
+        if self.resumed is not None:
+            i, descend = self.restore(doctors, shifts, stack, curr_schedule)
+        while True:
+            if descend:
+                if i > self.depth:
+                    self.depth = i
+                    self.unsaved = True
+                if i == self.split_depth:
+                    # Leave the rest of this subtree to whoever takes the prefix
+                    self.prefixes.append(self.assignments(curr_schedule))
+                    if not stack:
+                        return None
+                    # Nothing failed, so backjumping must not skip the other
+                    # choices above a prefix
+                    stack[-1].chronological = True
+                    descend = False
+                    continue
+                if len(shifts) == i:
+                    logger.info('Schedule Complete!!!')
+                    return curr_schedule
+                stack.append(self.enter(doctors, shifts, i))
+
+            frame = stack[-1]
+            shift = shifts[frame.i]
+            if frame.doctor is None and not frame.ranked and self.rng is None:
+                frame.doctor = self.best_doctor(frame.doctors, shift)
+            else:
+                if frame.doctor is not None:
+                    # Backtrack
+                    logger.log(TRACE, 'Backtracking Shift i=%d/%d', frame.i, len(shifts))
+                    if self.stats is not None:
+                        self.stats.backtrack(frame.i)
+                    self.unassign(frame, shift, curr_schedule)
+                    if not frame.ranked:
+                        frame.doctors.remove(frame.doctor)
+                        frame.doctors = self.sort_doctors(frame.doctors, shift)
+                        frame.ranked = True
+                    if self.twins is not None:
+                        self.drop_equivalent_doctors(frame, shift)
+                elif not frame.ranked:
+                    # Random choices need the near-tied doctors
+                    frame.doctors = self.sort_doctors(frame.doctors, shift)
+                    frame.ranked = True
+                frame.doctor = self.choose_doctor(frame.doctors, shift)
+                if frame.doctor is not None:
+                    frame.doctors.pop()
+
+            if frame.doctor is None:
+                stack.pop()
+                self.leave(frame)
+                if frame.nogood is not None:
+                    self.nogoods.add(frame.nogood)
+                if self.assigned is not None and not self.backjump(doctors, shifts, stack, frame, curr_schedule):
+                    self.unwind(shifts, stack, curr_schedule)
+                    return None
+                if not stack:
+                    return None
+                descend = False
+                continue
+
+            # Continue iterating
+            if self.nodes == self.next_checkpoint:
+                self.save_checkpoint(shifts, stack)
+                self.next_checkpoint += self.checkpoint_nodes
+            if self.nodes == self.node_limit:
+                return self.halt(shifts, stack, curr_schedule, f'Stopping search after {self.nodes} nodes')
+            if self.backtrack_limit is not None and self.backtracks >= self.backtrack_limit:
+                return self.halt(shifts, stack, curr_schedule, f'Stopping search after {self.backtracks} backtracks')
+            if self.stop is not None and self.stop.is_set():
+                return self.halt(shifts, stack, curr_schedule,
+                                 f'Stopping search after {self.nodes} nodes, stop was requested')
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                return self.halt(shifts, stack, curr_schedule,
+                                 f'Stopping search after {self.nodes} nodes, out of time')
+            self.assign(frame, shift, curr_schedule)
+            if self.domains is not None and not self.prune_domains(shifts, frame):
+                # A later shift has nobody left, try the next doctor
+                frame.chronological = True
+                descend = False
+                continue
+            i = frame.i + 1
+            descend = True
 
-        # Set shift to be used by sorting comparator
+    def enter(self, doctors, shifts, i, select=True):
+        """
+        Find the doctors for shift i, choosing which shift that is first when
+        ordering by fewest doctors.
+        """
+        if self.order == 'mrv' and select:
+            self.select_shift(shifts, i)
         shift = shifts[i]
-        global global_shift
-        global_shift = shift
 
-        self.try_resetting_weekly_hours(doctors, shifts, i)
-        available_doctors = self.filter_available_doctors(doctors, shift)
-        sorted_doctors = self.sort_doctors(available_doctors)
-        doctor = self.choose_doctor(sorted_doctors)
+        nogood = None
+        if self.nogoods is not None:
+            nogood = self.nogoods.digest(self.state(doctors, shift, i))
+            if self.nogoods.contains(nogood):
+                # Already failed from this state, the reasons were not kept
+                frame = SearchFrame(i, [])
+                frame.chronological = True
+                return frame
+
+        if self.table is not None:
+            available_doctors = self.table.filter_available_doctors(shift)
+        else:
+            available_doctors = self.filter_available_doctors(doctors, shift)
+
+        frame = SearchFrame(i, available_doctors)
+        frame.nogood = nogood
+        if self.twins is not None:
+            self.exclude_twin_doctors(frame, shift)
+            available_doctors = frame.doctors
+        if i < len(self.prefix):
+            # Replayed shifts have no alternatives, so they are never nogoods
+            doctor = self.doctors[self.prefix[i]]
+            assert doctor in available_doctors, f"Replaying shift i={i}, but {doctor.name} is not available"
+            frame.doctors = [doctor]
+            frame.ranked = True
+            frame.nogood = None
+        if self.assigned is not None:
+            frame.conflicts = self.find_conflicts(doctors, available_doctors, shift)
+        return frame
+
+    def halt(self, shifts, stack, curr_schedule, message):
+        """
+        Give up searching, undoing every assignment on the stack so the
+        doctors and shifts can be searched again.
+        """
+        logger.info(message)
+        self.stopped = True
+        if self.checkpoint is not None:
+            self.save_checkpoint(shifts, stack)
+        self.unwind(shifts, stack, curr_schedule)
+        return None
+
+    def unwind(self, shifts, stack, curr_schedule):
+        """
+        Undo every assignment on the stack once search ends without a
+        schedule, so the doctors and shifts can be searched again. Undoing is
+        not backtracking, so backtracks are left as they were.
+        """
+        backtracks = self.backtracks
+        while stack:
+            frame = stack.pop()
+            if frame.doctor is not None and shifts[frame.i].doctor is frame.doctor:
+                self.unassign(frame, shifts[frame.i], curr_schedule)
+            self.leave(frame)
+        self.backtracks = backtracks
+
+    def save_checkpoint(self, shifts, stack):
+        """
+        Save the stack, whose top frame has chosen a doctor that is about to
+        be assigned.
+        """
+        positions = self.positions
+        frames = [[self.shift_ids[shifts[frame.i]], positions[frame.doctor],
+                   [positions[doctor] for doctor in frame.doctors], frame.ranked,
+                   sorted(frame.conflicts), frame.chronological] for frame in stack]
+        self.checkpoint.save(frames, {'nodes': self.nodes, 'backtracks': self.backtracks,
+                                      'backjumps': self.backjumps})
+
+    def restore(self, doctors, shifts, stack, curr_schedule):
+        """
+        Rebuild the saved stack, assigning the doctor of every frame. Returns
+        the shift index to continue from and whether to descend to it.
+        """
+        frames, counters = self.resumed
+        logger.info('Resuming search at shift i=%d/%d after %d nodes', len(frames), len(shifts), counters['nodes'])
+        pruned = True
+        for shift_id, doctor, left, ranked, conflicts, chronological in frames:
+            i = len(stack)
+            if self.order == 'mrv':
+                j = next(j for j in range(i, len(shifts)) if self.shift_ids[shifts[j]] == shift_id)
+                shifts[i], shifts[j] = shifts[j], shifts[i]
+            assert self.shift_ids[shifts[i]] == shift_id, f"Resuming shift i={i}, but the checkpoint has other shifts"
+
+            frame = self.enter(doctors, shifts, i, select=False)
+            frame.doctor = self.doctors[doctor]
+            frame.doctors = [self.doctors[position] for position in left]
+            frame.ranked = ranked
+            frame.conflicts = set(conflicts)
+            frame.chronological = chronological
+            stack.append(frame)
+            self.assign(frame, shifts[i], curr_schedule)
+            pruned = self.domains is None or self.prune_domains(shifts, frame)
+            if not pruned:
+                frame.chronological = True
+
+        self.nodes = counters['nodes'] + (1 if frames else 0)
+        self.backtracks = counters['backtracks']
+        self.backjumps = counters['backjumps']
+        self.next_checkpoint = self.nodes + self.checkpoint_nodes
+        if not pruned:
+            return stack[-1].i, False
+        return len(stack), True
+
+    def leave(self, frame):
+        if frame.twin_key is not None:
+            self.twins[frame.twin_key].pop()
+
+    def twin_key(self, shift):
+        """
+        Shifts with the same key are interchangeable. Location only changes
+        the ranking.
+        """
+        return shift.start, shift.duration, tuple(sorted(shift.position_preferences))
 
-        if doctor is None:
-            self.undo_try_resetting_weekly_hours(doctors, shifts, i)
-            return None
+    def exclude_twin_doctors(self, frame, shift):
+        """
+        Skip the doctors that failed on the last identical shift still on the
+        stack. Giving one to this shift would only swap doctors with an
+        assignment of that shift that was already searched.
+        """
+        frame.twin_key = self.twin_key(shift)
+        twins = self.twins.setdefault(frame.twin_key, [])
+        if twins:
+            twin = twins[-1]
+            frame.excluded = twin.excluded.union(twin.eliminated)
+            kept = [doctor for doctor in frame.doctors if doctor not in frame.excluded]
+            if len(kept) < len(frame.doctors):
+                self.symmetry_skips += len(frame.doctors) - len(kept)
+                frame.doctors = kept
+                if self.assigned is not None:
+                    frame.conflicts.add(twin.i)
+        twins.append(frame)
+
+    def equivalence(self, doctor, shift):
+        """
+        Everything about a doctor that decides which of the remaining shifts
+        they can fill. Doctors with the same equivalence can swap every
+        remaining shift.
+        """
+        if self.order == 'mrv':
+            # Any assigned shift can be next to a remaining one
+            assigned = tuple((other.start, other.end, other.night, other.weekend) for other in doctor.timeline)
+        else:
+            assigned = doctor.resting_after(shift.start)
+        return (
+            doctor.seniority,
+            doctor.get_start_day(),
+            doctor.get_end_day(),
+            doctor.expected_night_range,
+            doctor.expected_weekend_range,
+            tuple((timeoff.start, timeoff.end) for timeoff in doctor.mandatory_timeoff),
+            tuple(doctor.weekly_hours),
+            doctor.actual_nights,
+            doctor.actual_weekends,
+            doctor.consecutive_night_shifts,
+            doctor.consecutive_weekend_shifts,
+            assigned,
+        )
+
+    def drop_equivalent_doctors(self, frame, shift):
+        """
+        The doctor at frame failed, so every doctor left who is equivalent to
+        them fails too.
+        """
+        failed = self.equivalence(frame.doctor, shift)
+        kept = []
+        for doctor in frame.doctors:
+            if self.equivalence(doctor, shift) == failed:
+                frame.eliminated.append(doctor)
+                self.symmetry_skips += 1
+                if self.assigned is not None:
+                    # They could fail because of their own assignments
+                    frame.conflicts.update(self.assigned[doctor])
+            else:
+                kept.append(doctor)
+        frame.doctors = kept
+        frame.eliminated.append(frame.doctor)
+
+    def state(self, doctors, shift, i):
+        """
+        Everything that decides whether shifts[i:] can be filled: each
+        doctor's hours this week, strings, nights and weekends worked, and
+        time-off still running when shift i starts. Hours worked in total and
+        by location only change the ranking, not whether a schedule exists.
+        """
+        return i, tuple(
+            (doctor.weekly_hours[shift.week],
+             doctor.consecutive_night_shifts,
+             doctor.consecutive_weekend_shifts,
+             doctor.actual_nights,
+             doctor.actual_weekends,
+             doctor.timeoff_index.ending_after(shift.start),
+             doctor.resting_after(shift.start))
+            for doctor in doctors
+        )
+
+    def assign(self, frame, shift, curr_schedule):
+        self.nodes += 1
+        shift.assign_doctor(frame.doctor)
+        curr_schedule.append(shift)
+        if self.table is not None:
+            self.table.update(frame.doctor)
+        if self.assigned is not None:
+            self.assigned[frame.doctor].append(frame.i)
+
+    def unassign(self, frame, shift, curr_schedule):
+        if self.unsaved:
+            self.save_partial(curr_schedule)
+        self.backtracks += 1
+        shift.unassign_doctor(frame.doctor)
+        curr_schedule.pop()
+        if self.table is not None:
+            self.table.update(frame.doctor)
+        if self.domains is not None:
+            self.restore_domains(frame)
+        if self.assigned is not None:
+            self.assigned[frame.doctor].pop()
+
+    def save_partial(self, curr_schedule):
+        self.partial = [(shift, shift.doctor) for shift in curr_schedule[:self.depth]]
+        self.unsaved = False
+
+    def apply_partial(self):
+        """
+        Assign the doctors of the deepest partial schedule, after a search
+        that did not complete.
+        """
+        for shift, doctor in self.partial:
+            if shift.doctor is None:
+                shift.assign_doctor(doctor)
 
-        # Continue iterating
-        shift.assign_doctor(doctor)
-        response = self.search(doctors, shifts, i+1, curr_schedule)
-        if response:
-            return response
+    def find_conflicts(self, doctors, available_doctors, shift):
+        """
+        Shifts whose assignments ruled a doctor out of this shift. A doctor
+        who could take it by seniority and working days, but is unavailable
+        with shifts assigned, may be unavailable because of any of them.
+        """
+        conflicts = set()
+        available = set(available_doctors)
+        for doctor in doctors:
+            if doctor in available or len(self.assigned[doctor]) == 0:
+                continue
+            if doctor.seniority.value not in shift.position_preferences:
+                continue
+            if not doctor.working_on_day(shift.start_day):
+                continue
+            conflicts.update(self.assigned[doctor])
+        return conflicts
+
+    def backjump(self, doctors, shifts, stack, frame, curr_schedule):
+        """
+        Every doctor failed for frame, so jump back to the latest shift in its
+        conflicts, undoing the shifts in between whose choices could not have
+        helped. Returns False if no earlier choice could have helped.
+        """
+        if frame.chronological:
+            target = frame.i - 1
         else:
-            # Backtrack
-            print(f'Backtracking Shift i={i}/{len(shifts)}')
-            shift.unassign_doctor(doctor)
-            self.undo_try_resetting_weekly_hours(doctors, shifts, i)
-            return None
+            target = max(frame.conflicts, default=-1)
+
+        if len(stack) == 0 or target < stack[0].i:
+            logger.info('Schedule Impossible, shift i=%d cannot be filled', frame.i)
+            return False
+
+        while stack[-1].i > target:
+            skipped = stack.pop()
+            if self.stats is not None:
+                self.stats.backtrack(skipped.i)
+            self.unassign(skipped, shifts[skipped.i], curr_schedule)
+            self.leave(skipped)
+            self.backjumps += 1
+
+        # The target takes over the reasons this frame failed
+        parent = stack[-1]
+        parent.conflicts.update(frame.conflicts)
+        parent.conflicts.discard(target)
+        parent.chronological = parent.chronological or frame.chronological
+        return True
 
     def filter_available_doctors(self, doctors, shift):
         available = []
         for doctor in doctors:
             # Mandatory timeoff
-            for timeoff in doctor.mandatory_timeoff:
-                if shift.overlaps_timeoff(timeoff):
-                    break
+            if doctor.is_on_timeoff(shift):
+                continue
 
             # Not working on day
             if not doctor.working_on_day(shift.start_day): # TODO: you might need to check they are not working the next day if duration goes over
                 continue
 
             # Does not have seniority
-            if doctor.seniority not in shift.position_preferences:
+            if doctor.seniority.value not in shift.position_preferences:
                 continue
 
             # Shift would exceed expected nights
-            if doctor.actual_nights == doctor.expected_night_range[1]:
+            if shift.night and doctor.actual_nights == doctor.expected_night_range[1]:
                 continue
 
             # Shift would exceed number of weekends
-            if doctor.actual_weekends == doctor.expected_weekend_range[1]:
+            if shift.weekend and doctor.actual_weekends == doctor.expected_weekend_range[1]:
                 continue
 
             # Shift would exceed 60 hours
-            if doctor.weekly_hours[-1] + shift.duration > 60:
+            if doctor.weekly_hours[shift.week] + shift.duration > 60:
                 continue
 
             # Doctor hit the max weekend string
-            if not doctor.can_work_more_weekend_shifts():
+            if shift.weekend and not doctor.can_work_more_weekend_shifts(shift):
                 continue
 
             # Doctor hit the max night string
-            if not doctor.can_work_more_night_shifts():
+            if shift.night and not doctor.can_work_more_night_shifts(shift):
                 continue
 
             available.append(doctor)
 
         return available
 
-    def sort_doctors(self, doctors):
-        return sorted(doctors, key=cmp_to_key(compare_doctors))
+    def undo(self):
+        """
+        Take back a complete schedule, so the doctors and shifts can be
+        searched again.
+        """
+        for shift in reversed(self.schedule):
+            shift.unassign_doctor(shift.doctor)
+
+    def assignments(self, schedule=None):
+        """
+        Input positions of the doctors filling the schedule, in shift order,
+        to be replayed as a prefix.
+        """
+        if schedule is None:
+            schedule = self.schedule
+        positions = {doctor: position for position, doctor in enumerate(self.doctors)}
+        return [positions[shift.doctor] for shift in schedule]
 
-    def choose_doctor(self, doctors):
+    def select_shift(self, shifts, i):
+        """
+        Move the unfilled shift with the fewest doctors left in its domain,
+        among those starting within MRV_HORIZON_HOURS of the earliest, to i,
+        the earliest if tied. Domains are pruned as doctors are assigned, so
+        no shift is filtered to choose one.
+        """
+        domains = self.domains
+        horizon = min(shift.start for shift in shifts[i:]) + MRV_HORIZON_HOURS
+        best = min((j for j in range(i, len(shifts)) if shifts[j].start < horizon),
+                   key=lambda j: (len(domains[shifts[j]]), shifts[j].start))
+        shifts[i], shifts[best] = shifts[best], shifts[i]
+
+    def initial_domains(self, doctors, shifts):
+        """
+        Doctors who could fill each shift before anything is assigned:
+        seniority, working days, time-off and pre-block hours given in the
+        input. Counters are left to pruning.
+        """
+        domains = {}
+        for shift in shifts:
+            domain = set()
+            for doctor in doctors:
+                if doctor.seniority.value not in shift.position_preferences:
+                    continue
+                if not doctor.working_on_day(shift.start_day):
+                    continue
+                if doctor.is_on_timeoff(shift):
+                    continue
+                if doctor.weekly_hours[shift.week] + shift.duration > 60:
+                    continue
+                domain.add(doctor)
+            domains[shift] = domain
+        return domains
+
+    def prune_domains(self, shifts, frame):
+        """
+        Remove the doctor just assigned at frame from every later shift that
+        filter_available_doctors will reject them for, whatever is assigned in
+        between, so a removal holds until this assignment is undone. Returns
+        False as soon as a shift is left without doctors.
+        """
+        shift = shifts[frame.i]
+        doctor = frame.doctor
+
+        # Caps hold for the rest of the block, strings until the doctor could
+        # take a shift that is not a night (weekend)
+        night_capped = doctor.actual_nights == doctor.expected_night_range[1]
+        weekend_capped = doctor.actual_weekends == doctor.expected_weekend_range[1]
+        night_string = not doctor.can_work_more_night_shifts()
+        weekend_string = not doctor.can_work_more_weekend_shifts()
+        if self.order == 'mrv':
+            # Later shifts are not in start order, strings are left to filtering
+            night_string = weekend_string = False
+
+        for other in shifts[frame.i + 1:]:
+            domain = self.domains[other]
+            if doctor not in domain:
+                continue
+            if (other.night and (night_capped or night_string)) or \
+                    (other.weekend and (weekend_capped or weekend_string)) or \
+                    doctor.is_on_timeoff(other) or \
+                    doctor.weekly_hours[other.week] + other.duration > 60:
+                domain.remove(doctor)
+                frame.pruned.append(other)
+                if len(domain) == 0:
+                    return False
+                continue
+
+            if not other.night:
+                night_string = False
+            if not other.weekend:
+                weekend_string = False
+        return True
+
+    def restore_domains(self, frame):
+        for other in frame.pruned:
+            self.domains[other].add(frame.doctor)
+        frame.pruned = []
+
+    def sort_doctors(self, doctors, shift):
+        return sorted(doctors, key=lambda doctor: rank_doctor(doctor, shift))
+
+    def best_doctor(self, doctors, shift):
+        """
+        The doctor choose_doctor would pick from sort_doctors, found without
+        sorting. Ties go to the last doctor, like the back of a stable sort.
+        """
         if len(doctors) == 0:
             return None
 
-        # TODO: potentially randomize instead of selecting the best doctor
+        return max(reversed(doctors), key=lambda doctor: rank_doctor(doctor, shift))
+
+    def choose_doctor(self, doctors, shift):
+        if len(doctors) == 0:
+            return None
+
+        if self.rng is not None:
+            # Move a random near-tied doctor to the back, the order of the
+            # rest is kept since they are tied with it
+            best = rank_doctor(doctors[-1], shift)[:NEAR_TIE_KEYS]
+            first = len(doctors) - 1
+            while first > 0 and rank_doctor(doctors[first - 1], shift)[:NEAR_TIE_KEYS] == best:
+                first -= 1
+            chosen = self.rng.randrange(first, len(doctors))
+            doctors[chosen], doctors[-1] = doctors[-1], doctors[chosen]
         return doctors[-1]
 
     def create_extra_shifts(self, shifts, doctors):
@@ -203,47 +873,12 @@ class Schedule:
         """
         pass
 
-    def undo_try_resetting_weekly_hours(self, doctors, shifts, i):
-        # When backtracking, determine if you need to remove this weeks hours
-        assert i > 0, f"Undoing weekly reset hours for shift 0, but should be impossible"
-
-        # Determine if you are crossing threshold back to last week
-        prev_shift = shifts[i-1]
-        shift = shifts[i]
-
-        # Undo reset doctor weekly hours worked if newest shift is Sun 7am
-        if shift.start_day % 7 == 0 and shift.start_time == 7:
-            # The previous shift exists and was earlier
-            if (prev_shift is not None) and \
-                    (prev_shift.start_day < shift.start_day and
-                     prev_shift.start_time < shift.start_time):
-                print(f'Undoing resetting weekly hours between prev_shift={prev_shift} and shift={shift}')
-                for doctor in doctors:
-                    doctor.undo_reset_weekly_hours()
-
-    def try_resetting_weekly_hours(self, doctors, shifts, i):
-        # No need to reset if its the first # TODO: check this is accurate
-        if i < 1:
-            return
-
-        prev_shift = shifts[i-1]
-        shift = shifts[i]
-
-        # Reset doctor weekly hours worked if newest shift is Sun 7am
-        if shift.start_day % 7 == 0 and shift.start_time == 7:
-            # The previous shift exists and was earlier
-            if (prev_shift is not None) and \
-               (prev_shift.start_day < shift.start_day and
-                prev_shift.start_time < shift.start_time):
-                print(f'Resetting weekly hours between prev_shift={prev_shift} and shift={shift}')
-                for doctor in doctors:
-                    doctor.reset_weekly_hours(shift.start_day)
-
     def export(self):
         # TODO: export schedule to image or csv
         pass
 
     def __repr__(self):
-        print('FINAL SCHEDULE:')
-        for shift in self.schedule:
-            print(shift)
\ No newline at end of file
+        if self.schedule is not None:
+            return '\n'.join(['FINAL SCHEDULE:'] + [str(shift) for shift in self.schedule])
+        lines = [f'NO SCHEDULE, filled {len(self.partial)} shifts, {len(self.uncovered)} uncovered:']
+        return '\n'.join(lines + [str(shift) for shift in self.uncovered])
\ No newline at end of file
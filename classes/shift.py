@@ -1,5 +1,12 @@
+import logging
+from bisect import bisect_left
+
+from classes.interval import Interval, check_day_time_duration
+from classes.log import TRACE
 from settings.config import Locations
 
+logger = logging.getLogger(__name__)
+
 
 def compare_shifts(shift1, shift2):
     # Sort by day, if tied, sort by time
@@ -14,40 +21,50 @@ def compare_shifts(shift1, shift2):
     else:
         return 0
 
-# TODO: create check_day_time_duration which should be reused by TimeOff and Shift
+def link_conflicts(shifts):
+    """
+    Give every shift its index in shifts and the indices of the shifts one
+    doctor cannot also work: those that overlap it or the mandatory rest
+    after it, which is as long as the shift. Run once the shifts are parsed.
+    Sweeps the shifts in start order, so only pairs that conflict are
+    visited. Indices rather than shifts keep the shifts free of cycles, so
+    they pickle and copy without recursing through each other.
+    """
+    for index, shift in enumerate(shifts):
+        shift.index = index
+        shift.conflicts = []
+    ordered = sorted(shifts, key=lambda shift: shift.start)
+    starts = [shift.start for shift in ordered]
+    for i, shift in enumerate(ordered):
+        # Later shifts starting before this shift's rest ends
+        for other in ordered[i + 1:bisect_left(starts, shift.end + shift.duration)]:
+            shift.conflicts.append(other.index)
+            other.conflicts.append(shift.index)
+
 
 # TODO: test if shift starts at day 1
-class Shift:
+class Shift(Interval):
+    __slots__ = (
+        'location', 'start_day', 'start_time', 'duration', 'position_preferences',
+        'night', 'weekend', 'doctor', 'optional', 'index', 'conflicts',
+    )
+
     def __init__(self, block, location, start_day, start_time, duration, position_preferences, optional='False'):
         # Validate types
         assert type(location) == str
-        assert type(start_day) == int
-        assert type(start_time) == int
-        assert type(duration) == int
         assert isinstance(position_preferences, list)
         assert type(optional) == str
 
         assert location in Locations, f"Shift location is {location}, but must be one of {', '.join([l for l in Locations])}"
 
-        # Validate day
-        assert block.start <= start_day <= block.end, f"Shift start day for {location} is {start_day}, but must be between {block.start} and {block.end}"
-
-        # Validate start time
-        assert 0 <= start_time <= 23, f"Shift start time for {location} is {start_time}, but must be between 0 and 23"
-        if start_day == block.start:
-            assert 7 <= start_time, f"Shift start time for {location} is {start_time}, but must be after 7am for the first day"
+        start = check_day_time_duration(block, f"shift at {location}", start_day, start_time, duration)
 
         # Validate duration
         assert duration in [8, 9, 10, 12], f"Shift duration for {location} is {duration}, but can only be 8, 9, 10 or 12 hours"
-        end_day = start_day + (start_time + duration) // 24
-        end_time = (start_time + duration % 24) % 24
-
-        # Days start at 7am, so you just need to end at or before the day after last
-        if end_day == block.end + 1:
-            assert end_time <= 7, f"Shift end time for {location} is {end_time}, but must end before 7am if it extends past the last day"
 
         assert optional in ['False', 'True'], f"Shift optional found is {optional}, but must be either True or False"
 
+        super().__init__(block, start, duration)
         self.location = location
         self.start_day = start_day
         self.start_time = start_time
@@ -57,20 +74,21 @@ class Shift:
         self.weekend = self.determine_if_weekend(start_day, start_time)
         self.doctor = None
         self.optional = (optional == 'True')
+        # Filled in by link_conflicts
+        self.index = None
+        self.conflicts = None
 
-        print(f'Creating {self}')
+        logger.debug('Creating %s', self)
 
     def assign_doctor(self, doctor):
         self.doctor = doctor
         doctor.add_shift(self)
-        doctor.add_mandatory_time_off(self.start_time, self.start_time, self.duration)
-        print(f'Assigning Shift:{self} to Doctor:{doctor}')
+        logger.log(TRACE, 'Assigning Shift:%s to Doctor:%s', self, doctor.name)
 
     def unassign_doctor(self, doctor):
         self.doctor = None
-        doctor.remove_shift(self)
-        doctor.remove_mandatory_timeoff()
-        print(f'Unassigning Shift:{self} to Doctor:{doctor}')
+        doctor.remove_shift()
+        logger.log(TRACE, 'Unassigning Shift:%s to Doctor:%s', self, doctor.name)
 
     def determine_if_night(self, start_time):
         # Night shifts start at 7pm. Starting at 7am does not count.
@@ -92,22 +110,11 @@ class Shift:
         return False
 
     def overlaps_timeoff(self, timeoff):
-        # TODO: account for the previous night might overlap the next morning
-        start1 = self.start_time
-        end1 = self.start_time + self.duration
-
-        start2 = timeoff.start_time
-        end2 = timeoff.start_time + timeoff.duration
-
-        # TODO: write tests to check that start/end overlaps do not count
-        if start2 <= start1 < end2:
-            return True
-        if start2 < end1 <= end2:
-            return True
-        return False
+        return self.overlaps(timeoff)
 
     def __repr__(self):
-        attrs = vars(self)
         msg = "Shift "
-        msg += ', '.join(f"{key}:{value}" for key, value in attrs.items())
+        # Only name the doctor, their representation includes this shift
+        msg += ', '.join(f"{key}:{self.doctor.name if key == 'doctor' and self.doctor else getattr(self, key)}"
+                         for key in self.__slots__ if key != 'conflicts')
         return msg
@@ -0,0 +1,111 @@
+import logging
+import multiprocessing
+import os
+import time
+
+from classes.control import RunControl
+from classes.schedule import Schedule
+
+logger = logging.getLogger(__name__)
+
+
+# Set in each pool process by init_worker, so work items only carry a prefix
+worker_state = {}
+
+
+def init_worker(block, doctors, shifts, options, control):
+    worker_state.update(block=block, doctors=doctors, shifts=shifts, options=options, control=control)
+
+
+def solve_subtree(item):
+    """
+    Search every schedule starting with the item's prefix. Every item in a
+    worker searches the worker's own doctors and shifts, in their input
+    order. A search that stops or fails leaves them unassigned, and a
+    complete schedule is undone once its assignments are taken.
+    """
+    index, prefix = item
+    start = time.perf_counter()
+    block = worker_state['block']
+    shifts = list(worker_state['shifts'])
+    schedule = Schedule(block, worker_state['doctors'], shifts, prefix=prefix, control=worker_state['control'],
+                        **worker_state['options'])
+
+    if schedule.schedule is not None:
+        status = 'complete'
+    elif schedule.stopped:
+        status = 'stopped'
+    else:
+        status = 'impossible'
+    assignments = None
+    if status == 'complete':
+        assignments = schedule.assignments()
+        schedule.undo()
+    return {
+        'item': index,
+        'prefix': prefix,
+        'status': status,
+        'nodes': schedule.nodes,
+        'seconds': time.perf_counter() - start,
+        'assignments': assignments,
+    }
+
+
+class SplitSearch:
+    """
+    Split one search across worker processes. Every way to fill the first
+    depth shifts becomes a work item, and idle workers take the next item
+    from the pool until one finds a complete schedule or all of them are
+    exhausted, which proves no schedule exists. The winning assignments are
+    replayed onto doctors and shifts in this process.
+
+    Items are handed out one at a time, so a worker that finishes a small
+    subtree early picks up another instead of waiting. Pick depth so there
+    are many more items than workers.
+    """
+    def __init__(self, block, doctors, shifts, workers=None, depth=2, **options):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        assert workers > 0, f"Split search workers is {workers}, but must be positive"
+        # Every worker would save to the same log, and workers stop on the
+        # search's own event
+        control = options.pop('control', None)
+        assert control is None or control.checkpoint is None, "Split search cannot checkpoint or resume"
+        time_limit = control.time_limit if control is not None else None
+
+        # Prefixes are dead ends, not failures, and limits apply per item
+        enumerate_options = {key: value for key, value in options.items()
+                             if key not in ['nogood_limit', 'node_limit']}
+        splitter = Schedule(block, doctors, shifts, split_depth=depth, **enumerate_options)
+        self.items = splitter.prefixes
+        logger.info('Split search has %d items at depth %d', len(self.items), splitter.split_depth)
+
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        worker_control = RunControl(time_limit=time_limit, stop=stop)
+        self.stats = []
+        self.winner = None
+        with context.Pool(workers, initializer=init_worker,
+                          initargs=(block, doctors, shifts, options, worker_control)) as pool:
+            for result in pool.imap_unordered(solve_subtree, enumerate(self.items), chunksize=1):
+                self.stats.append(result)
+                if result['status'] == 'complete':
+                    self.winner = result['item']
+                    stop.set()
+                    break
+        self.stats.sort(key=lambda result: result['item'])
+
+        if self.winner is not None:
+            logger.info('Split search won by item %d', self.winner)
+            prefix = next(result['assignments'] for result in self.stats if result['item'] == self.winner)
+            self.schedule = Schedule(block, doctors, shifts, prefix=prefix, **enumerate_options).schedule
+        else:
+            if self.proved_impossible():
+                logger.info('Split search proved no schedule exists')
+            else:
+                logger.info('Split search found no schedule, some items were stopped')
+            self.schedule = None
+
+    def proved_impossible(self):
+        return len(self.stats) == len(self.items) and \
+            all(result['status'] == 'impossible' for result in self.stats)
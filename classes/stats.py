@@ -0,0 +1,66 @@
+import json
+import time
+
+
+class SearchStats:
+    """
+    Counters and timers for one search. Timed methods are wrapped on the
+    schedule (and its table) only when stats are collected, so searching
+    without stats runs the plain methods.
+
+    backtracks counts the doctors taken back from each shift index, in the
+    order shifts are filled, and candidates counts how often a filter left
+    each number of doctors.
+    """
+    def __init__(self, num_shifts):
+        self.nodes = 0
+        self.backtracks = [0] * num_shifts
+        self.candidates = {}
+        self.calls = {'filter': 0, 'sort': 0, 'assign': 0}
+        self.seconds = {'filter': 0.0, 'sort': 0.0, 'assign': 0.0}
+        self.shifts = []
+
+    def timed(self, kind, method):
+        calls = self.calls
+        seconds = self.seconds
+
+        def wrapper(*args):
+            start = time.perf_counter()
+            result = method(*args)
+            seconds[kind] += time.perf_counter() - start
+            calls[kind] += 1
+            if kind == 'filter':
+                self.candidates[len(result)] = self.candidates.get(len(result), 0) + 1
+            return result
+        return wrapper
+
+    def backtrack(self, i):
+        self.backtracks[i] += 1
+
+    def to_dict(self):
+        filters = sum(self.candidates.values())
+        return {
+            'nodes': self.nodes,
+            'backtracks': sum(self.backtracks),
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'mean_candidates': sum(size * count for size, count in self.candidates.items()) / filters
+            if filters else 0.0,
+            'candidates': {str(size): self.candidates[size] for size in sorted(self.candidates)},
+            # Heat map of the shifts search backtracked on
+            'shifts': [
+                {'i': i, 'day': shift.start_day, 'location': shift.location, 'start_time': shift.start_time,
+                 'backtracks': self.backtracks[i]}
+                for i, shift in enumerate(self.shifts) if self.backtracks[i] > 0
+            ],
+        }
+
+    def to_json(self, path=None):
+        """
+        The stats as JSON, also written to path if given.
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text + '\n')
+        return text
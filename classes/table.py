@@ -0,0 +1,88 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from settings.config import MAX_CONSECUTIVE_NIGHT_SHIFTS, MAX_CONSECUTIVE_WEEKEND_SHIFTS
+
+
+class DoctorTable:
+    """
+    Columnar copy of the doctor counters that Schedule.filter_available_doctors
+    checks, so the eligible doctors for a shift come from one boolean mask
+    instead of a Python loop over every doctor. The Doctor objects stay the
+    source of truth for reporting and ranking; search refreshes a doctor's
+    row after assigning or unassigning them.
+
+    Mandatory time-off is kept as a running count of each doctor's hours off,
+    so a shift overlaps time-off when the count grows across its hours. It is
+    read once, time-off added after the table is built is not seen. Shifts
+    blocked by assigned shifts are a boolean per shift index and doctor.
+    """
+    def __init__(self, doctors, shifts):
+        if np is None:
+            raise ImportError("The numpy engine requires numpy, install it or use engine='python'")
+
+        self.doctors = doctors
+        self.rows = {doctor: row for row, doctor in enumerate(doctors)}
+        self.objects = np.empty(len(doctors), dtype=object)
+        self.objects[:] = doctors
+        self.seniority = np.array([doctor.seniority.value for doctor in doctors], dtype=np.int8)
+        self.start_day = np.array([doctor.get_start_day() for doctor in doctors], dtype=np.int16)
+        self.end_day = np.array([doctor.get_end_day() for doctor in doctors], dtype=np.int16)
+        self.night_limit = np.array([doctor.expected_night_range[1] for doctor in doctors], dtype=np.float64)
+        self.weekend_limit = np.array([doctor.expected_weekend_range[1] for doctor in doctors], dtype=np.float64)
+
+        # Hours off before each block hour, from first to last by doctor
+        timeoffs = [(row, timeoff.start, timeoff.end) for row, doctor in enumerate(doctors)
+                    for timeoff in doctor.mandatory_timeoff]
+        self.first_hour = min([0] + [start for _, start, _ in timeoffs])
+        last_hour = max([0] + [end for _, _, end in timeoffs])
+        off = np.zeros((last_hour - self.first_hour, len(doctors)), dtype=np.int32)
+        for row, start, end in timeoffs:
+            off[start - self.first_hour:end - self.first_hour, row] = 1
+        self.hours_off = np.zeros((len(off) + 1, len(doctors)), dtype=np.int32)
+        np.cumsum(off, axis=0, out=self.hours_off[1:])
+
+        size = len(doctors)
+        num_indices = max((shift.index for shift in shifts if shift.index is not None), default=-1) + 1
+        self.blocked = np.zeros((num_indices, size), dtype=bool)
+        self.actual_nights = np.zeros(size, dtype=np.int32)
+        self.actual_weekends = np.zeros(size, dtype=np.int32)
+        self.consecutive_nights = np.zeros(size, dtype=np.int32)
+        self.consecutive_weekends = np.zeros(size, dtype=np.int32)
+        self.weekly_hours = np.zeros((size, len(doctors[0].weekly_hours) if doctors else 0), dtype=np.float64)
+        for doctor in doctors:
+            self.update(doctor)
+
+    def update(self, doctor):
+        row = self.rows[doctor]
+        self.actual_nights[row] = doctor.actual_nights
+        self.actual_weekends[row] = doctor.actual_weekends
+        self.consecutive_nights[row] = doctor.consecutive_night_shifts
+        self.consecutive_weekends[row] = doctor.consecutive_weekend_shifts
+        self.weekly_hours[row] = doctor.weekly_hours
+        self.blocked[:, row] = False
+        self.blocked[list(doctor.blocked), row] = True
+
+    def filter_available_doctors(self, shift):
+        """
+        Same doctors, in the same order, as Schedule.filter_available_doctors.
+        """
+        mask = np.isin(self.seniority, shift.position_preferences)
+        mask &= (self.start_day <= shift.start_day) & (shift.start_day <= self.end_day)
+        mask &= self.weekly_hours[:, shift.week] + shift.duration <= 60
+        if shift.night:
+            mask &= self.actual_nights != self.night_limit
+            mask &= self.consecutive_nights != MAX_CONSECUTIVE_NIGHT_SHIFTS
+        if shift.weekend:
+            mask &= self.actual_weekends != self.weekend_limit
+            mask &= self.consecutive_weekends != MAX_CONSECUTIVE_WEEKEND_SHIFTS
+
+        last = len(self.hours_off) - 1
+        start = min(max(shift.start - self.first_hour, 0), last)
+        end = min(max(shift.end - self.first_hour, 0), last)
+        mask &= self.hours_off[end] == self.hours_off[start]
+        if shift.index is not None and shift.index < len(self.blocked):
+            mask &= ~self.blocked[shift.index]
+        return self.objects[mask].tolist()
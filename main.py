@@ -1,14 +1,42 @@
+import argparse
+import sys
+
+from cache import load_inputs
 from classes.block import Block
+from classes.control import RunControl
+from classes.log import configure
 from classes.schedule import Schedule
+from parse import InputError
 from settings.block import START_DAY, END_DAY
-from parse import parse_doctors, parse_shifts
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Schedule the block in settings/')
+    parser.add_argument('--time-limit', type=float, help='seconds to search before keeping the deepest partial schedule')
+    parser.add_argument('--checkpoint', help='file the search position is saved to, none are saved without it')
+    parser.add_argument('--checkpoint-nodes', type=int, default=10000, help='nodes searched between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='continue from the position saved to --checkpoint')
+    parser.add_argument('--stats', help='file to write search stats to as JSON')
+    parser.add_argument('--cache-dir', default='.cache', help='directory of compiled inputs')
+    parser.add_argument('--log-level', default='WARNING', help='WARNING, INFO, DEBUG or TRACE')
+    args = parser.parse_args()
+    if args.resume and args.checkpoint is None:
+        parser.error('--resume needs --checkpoint')
+    configure(args.log_level)
+
     block = Block(START_DAY, END_DAY)
-    doctors = parse_doctors(block, 'settings/doctors.csv')
-    shifts = parse_shifts(block, 'settings/shifts.csv')
-    schedule = Schedule(block, doctors, shifts)
+    try:
+        doctors, shifts = load_inputs(block, 'settings/doctors.csv', 'settings/shifts.csv', args.cache_dir)
+    except InputError as e:
+        # Every error in the file at once, without a traceback
+        sys.exit(str(e))
+    control = RunControl(time_limit=args.time_limit, checkpoint=args.checkpoint,
+                         checkpoint_nodes=args.checkpoint_nodes, resume=args.resume, stats=args.stats is not None)
+    schedule = Schedule(block, doctors, shifts, check_feasibility=True, control=control)
+    if args.stats is not None:
+        schedule.stats.to_json(args.stats)
+    if schedule.schedule is None:
+        schedule.apply_partial()
     schedule.create_extra_shifts(shifts, doctors)
 
     print('PRINTING SCHEDULE AND STATS')
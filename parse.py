@@ -1,87 +1,158 @@
+"""
+CSV ingestion for doctors and shifts. A file is read in one pass and its
+cells are validated a column at a time over batches of rows. Every problem
+is collected with its row and column, and objects are only built once the
+whole file is valid, so one run reports everything wrong with an input and
+validation does not depend on asserts, which python -O strips.
+"""
 import csv
+import logging
 
-from classes.doctor import Doctor
-from classes.shift import Shift
+from classes.doctor import Doctor, requested_timeoff_problem
+from classes.interval import day_time_duration_problem
+from classes.shift import Shift, link_conflicts
 from classes.timeoff import TimeOff
+from settings.config import Locations, Seniority
 
+logger = logging.getLogger(__name__)
 
-def parse_raw_timeoff(name, timeoff_string, mandatory=True):
+# Rows validated together, a column at a time
+BATCH_ROWS = 4096
+NULL = '_'
+
+DOCTOR_COLUMNS = [
+    'Name', 'Seniority', 'Chief', 'Carried Hours', 'Requested Day:Time:Duration',
+    'Mandatory Day:Time:Duration', 'Half Block', 'Pre Block Hours',
+]
+SHIFT_COLUMNS = ['Location', 'Day', 'Time', 'Duration', 'Position Preferences', 'Optional']
+
+
+class InputError(Exception):
     """
-    Format is space delimited day:time:duration.
+    Every problem found in an input file, as (row, column, message) errors.
+    Rows are numbered as lines of the file, the header is row 1, and column
+    is None for a problem with the row as a whole.
     """
-    if timeoff_string == '_':
-        return None
+    def __init__(self, filename, errors):
+        self.filename = filename
+        self.errors = sorted(errors, key=lambda error: error[0])
+        lines = [f"{len(errors)} errors in {filename}"]
+        for row, column, message in self.errors:
+            lines.append(f"row {row}: {message}" if column is None else f"row {row}, {column}: {message}")
+        super().__init__('\n'.join(lines))
+
 
-    timeoffs = []
-    string_timeoffs = timeoff_string.split(' ')
-    for st in string_timeoffs:
-        assert len(st.split(':')) == 3, f"Incorrect format for timeoff, found {st}, expecting Day:Time:Duration"
-        start_day, start_time, duration = st.split(':')
-        timeoff = TimeOff(name, int(start_day), int(start_time), int(duration), mandatory)
-        timeoffs.append(timeoff)
+def read_batches(filename, columns, errors):
+    """
+    Yield (rows, cells) for batches of up to BATCH_ROWS rows, with cells
+    holding one list per column. Rows of all empty cells are skipped, and
+    rows with empty cells are reported and left out.
+    """
+    with open(filename, 'r', newline='') as file:
+        reader = csv.reader(file)
+        header = [name.strip() for name in next(reader, [])]
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise InputError(filename, [(1, column, "Column is missing from the header") for column in missing])
+        indices = [header.index(column) for column in columns]
 
-    return timeoffs
+        rows = []
+        batch = []
+        for record in reader:
+            values = [record[i].strip() if i < len(record) else '' for i in indices]
+            if all(value == '' for value in record):
+                # Empty rows keep the csv organized
+                continue
+            if '' in values:
+                if NULL in values:
+                    errors.append((reader.line_num, None, "Row found with empty string and null value"))
+                else:
+                    errors.extend((reader.line_num, column, "Row value is empty string, should either be explicitly null ('_') or a non-empty value")
+                                  for column, value in zip(columns, values) if value == '')
+                continue
 
+            rows.append(reader.line_num)
+            batch.append(values)
+            if len(batch) == BATCH_ROWS:
+                yield rows, [list(cells) for cells in zip(*batch)]
+                rows = []
+                batch = []
+        if batch:
+            yield rows, [list(cells) for cells in zip(*batch)]
 
-def is_empty(row):
+
+def validate_column(rows, column, cells, convert, errors):
     """
-    Skips a row of input if all cells are empty strings. Allows
-    for csv to be more organized.
+    Convert each cell of a column, None for cells convert rejects with a
+    ValueError, which is reported.
     """
-    all_empty = True
-    found_null = False
-    found_empty = False
-    for key, value in row.items():
-        if value != '':
-            all_empty = False
-        if value == '_':
-            found_null = True
-        if value == '':
-            found_empty = True
+    values = []
+    for row, cell in zip(rows, cells):
+        try:
+            values.append(convert(cell))
+        except ValueError as e:
+            errors.append((row, column, str(e)))
+            values.append(None)
+    return values
 
-    # Error if there are a mix of empty strings and
-    # explicitly set null ('_') cells.
-    assert not (found_empty and found_null), f"Row found with empty string and null value"
 
-    return all_empty
+def to_int(label):
+    def convert(cell):
+        try:
+            return int(cell)
+        except ValueError:
+            raise ValueError(f"{label} is {cell}, but must be an integer") from None
+    return convert
 
 
-def clean_row(row):
-    # Remove trailing and leading whitespace
-    for key, value in row.items():
-        row[key] = value.strip()
-        assert value != '', f"Row value is empty string, should either be explicitly null ('_') or a non-empty value"
-    return row
+def to_float(label):
+    def convert(cell):
+        try:
+            return float(cell)
+        except ValueError:
+            raise ValueError(f"{label} is {cell}, but must be a number") from None
+    return convert
 
 
-def parse_doctors(filename, block):
+def to_choice(label, choices, key=str):
+    def convert(cell):
+        if key(cell) not in choices:
+            raise ValueError(f"{label} is {cell}, but must be one of {', '.join(sorted(choices))}")
+        return cell
+    return convert
 
-    doctors = []
-    with open(filename, 'r') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if is_empty(row):
-                continue
 
-            row = clean_row(row)
-            requested_raw = row['Requested Day:Time:Duration']  # TODO: test what happens if it is None
-            mandatory_raw = row['Mandatory Day:Time:Duration']
-            requested = parse_raw_timeoff(row['Name'], requested_raw, False)
-            mandatory = parse_raw_timeoff(row['Name'], mandatory_raw, True)
-            doctor = Doctor(
-                block,
-                row['Name'],
-                int(row['Seniority']),
-                row['Chief'],
-                float(row['Carried Hours']),
-                row['Half Block'],
-                int(row['Pre Block Hours']),
-                requested,
-                mandatory
-            )
-            doctors.append(doctor)
+def to_seniority(cell):
+    seniority = to_int('Seniority')(cell)
+    if not Seniority.has_value(seniority):
+        raise ValueError(f"Seniority is {seniority}, but must be between 0 and 4 which represent Off-Service, First Year, Second Year, Third Year, Fourth Year")
+    return seniority
 
-    return doctors
+
+def to_timeoff(block, mandatory):
+    """
+    Time-off as space delimited day:time:duration, or null for none. Each is
+    kept as a (day, time, duration) tuple until the row is built.
+    """
+    def convert(cell):
+        if cell == NULL:
+            return []
+        timeoffs = []
+        for st in cell.split():
+            if len(st.split(':')) != 3:
+                raise ValueError(f"Incorrect format for timeoff, found {st}, expecting Day:Time:Duration")
+            try:
+                start_day, start_time, duration = map(int, st.split(':'))
+            except ValueError:
+                raise ValueError(f"Time-off {st} must be integers, expecting Day:Time:Duration") from None
+            problem = day_time_duration_problem(block, f"time-off {st}", start_day, start_time, duration)
+            if problem is None and not mandatory and duration > 72:
+                problem = f"Duration for requested time-off {st} is {duration}, but must be less than or equal to 72 hours"
+            if problem is not None:
+                raise ValueError(problem)
+            timeoffs.append((start_day, start_time, duration))
+        return timeoffs
+    return convert
 
 
 def parse_raw_position_preferences(position_preferences_string):
@@ -89,29 +160,108 @@ def parse_raw_position_preferences(position_preferences_string):
     Format is delimitied by '>' character.
     """
     preferences = []
-    string_preferences = position_preferences_string.split('>')
-    for preference in string_preferences:
-        assert preference.isnumeric(), f"Preference is {preference} within position preferences {position_preferences_string}, but must be convertable to number"
+    for preference in position_preferences_string.split('>'):
+        if not preference.isnumeric():
+            raise ValueError(f"Preference is {preference} within position preferences {position_preferences_string}, but must be convertable to number")
+        if not Seniority.has_value(int(preference)):
+            raise ValueError(f"Preference is {preference} within position preferences {position_preferences_string}, but must be a seniority between 0 and 4")
         preferences.append(int(preference))
 
     return preferences
 
 
+def to_duration(cell):
+    duration = to_int('Duration')(cell)
+    if duration not in [8, 9, 10, 12]:
+        raise ValueError(f"Shift duration is {duration}, but can only be 8, 9, 10 or 12 hours")
+    return duration
+
+
+def parse_doctors(block, filename):
+    errors = []
+    records = []
+    converters = [
+        str,
+        to_seniority,
+        to_choice('Chief', {'yes', 'no'}, key=str.lower),
+        to_float('Carried hours'),
+        to_timeoff(block, False),
+        to_timeoff(block, True),
+        to_choice('Half block', {'1', '2', 'both'}, key=str.lower),
+        to_int('Pre-block hours'),
+    ]
+    for rows, cells in read_batches(filename, DOCTOR_COLUMNS, errors):
+        columns = [validate_column(rows, column, column_cells, convert, errors)
+                   for column, column_cells, convert in zip(DOCTOR_COLUMNS, cells, converters)]
+        for row, values in zip(rows, zip(*columns)):
+            if None in values:
+                continue
+            name, _, _, carry_hours, requested, _, half_block, pre_block_hours = values
+
+            # Rules across columns, as the constructor checks them
+            problem = None
+            if pre_block_hours < 0:
+                problem = f"Pre-block hours worked for this week by {name} is {pre_block_hours}, but must be non-negative"
+            elif -carry_hours < pre_block_hours:
+                problem = f"{name} worked {pre_block_hours} this week before the block started, so there minimum carried hours should be at least this large, found {-carry_hours}"
+            else:
+                problem = requested_timeoff_problem(name, half_block.lower(), [
+                    TimeOff(block, name, *timeoff, mandatory=False) for timeoff in sorted(requested)
+                ])
+            if problem is not None:
+                errors.append((row, None, problem))
+                continue
+            records.append(values)
+
+    if errors:
+        raise InputError(filename, errors)
+
+    doctors = []
+    for name, seniority, chief, carry_hours, requested, mandatory, half_block, pre_block_hours in records:
+        doctors.append(Doctor(
+            block,
+            name,
+            seniority,
+            chief,
+            carry_hours,
+            half_block,
+            pre_block_hours,
+            [TimeOff(block, name, *timeoff, mandatory=False) for timeoff in requested],
+            [TimeOff(block, name, *timeoff, mandatory=True) for timeoff in mandatory],
+        ))
+
+    logger.info('Parsed %d doctors from %s', len(doctors), filename)
+    return doctors
+
+
 def parse_shifts(block, filename):
-    shifts = []
-    with open(filename, 'r') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            position_preferences = parse_raw_position_preferences(row['Position Preferences'])
-            shift = Shift(
-                block,
-                row['Location'],
-                int(row['Day']),
-                int(row['Time']),
-                int(row['Duration']),
-                position_preferences,
-                row['Optional']
-            )
-            shifts.append(shift)
+    errors = []
+    records = []
+    converters = [
+        to_choice('Shift location', Locations),
+        to_int('Start day'),
+        to_int('Start time'),
+        to_duration,
+        parse_raw_position_preferences,
+        to_choice('Shift optional', {'False', 'True'}),
+    ]
+    for rows, cells in read_batches(filename, SHIFT_COLUMNS, errors):
+        columns = [validate_column(rows, column, column_cells, convert, errors)
+                   for column, column_cells, convert in zip(SHIFT_COLUMNS, cells, converters)]
+        for row, values in zip(rows, zip(*columns)):
+            if None in values:
+                continue
+            location, start_day, start_time, duration, _, _ = values
+            problem = day_time_duration_problem(block, f"shift at {location}", start_day, start_time, duration)
+            if problem is not None:
+                errors.append((row, None, problem))
+                continue
+            records.append(values)
+
+    if errors:
+        raise InputError(filename, errors)
 
+    shifts = [Shift(block, *values) for values in records]
+    link_conflicts(shifts)
+    logger.info('Parsed %d shifts from %s', len(shifts), filename)
     return shifts
@@ -0,0 +1,76 @@
+"""
+Small doctors and shifts shared by the tests, each set up so search runs into
+one situation.
+"""
+from classes.doctor import Doctor
+from classes.shift import Shift
+
+
+def make_daily_case(block):
+    """
+    A morning open to everyone and a senior night every day of the block,
+    for twenty doctors, enough for many schedules.
+    """
+    doctors = [Doctor(block, f'Doctor {i}', i % 5, carry_hours=0.0) for i in range(20)]
+    shifts = []
+    for day in range(block.start, block.end + 1):
+        shifts.append(Shift(block, 'Acute 1', day, 7, 9, [0, 1, 2, 3, 4]))
+        shifts.append(Shift(block, 'Resus Senior', day, 19, 12, [4, 3]))
+    return doctors, shifts
+
+
+def make_backjump_case(block):
+    """
+    The first year is preferred for the first shift, which leaves them resting
+    through the last shift that only they can take. The two shifts in between
+    have nothing to do with it.
+    """
+    first_year = Doctor(block, 'First Year', 1, carry_hours=0.0)
+    doctors = [first_year] + [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(3)]
+    shifts = [
+        Shift(block, 'Acute 1', 2, 7, 8, [1, 0]),
+        Shift(block, 'Acute 2', 2, 9, 8, [0]),
+        Shift(block, 'Mid-Fast', 2, 11, 8, [0]),
+        Shift(block, 'PIT', 2, 20, 8, [1]),
+    ]
+    return first_year, doctors, shifts
+
+
+def make_nogood_case(block):
+    """
+    Two pairs of interchangeable doctors cover two pairs of simultaneous
+    shifts, then nobody is left for the evening. Swapping either pair
+    reaches a state that already failed.
+    """
+    doctors = [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(2)] + \
+              [Doctor(block, f'First Year {i}', 1, carry_hours=0.0) for i in range(2)]
+    shifts = [
+        Shift(block, 'Acute 1', 2, 7, 8, [0]),
+        Shift(block, 'Acute 2', 2, 7, 8, [0]),
+        Shift(block, 'Mid-Fast', 2, 9, 8, [1]),
+        Shift(block, 'PIT', 2, 9, 8, [1]),
+        Shift(block, 'Resus', 2, 20, 8, [0, 1]),
+    ]
+    return doctors, shifts
+
+
+def make_scarce_shift_case(block):
+    """
+    The first year is preferred for the morning, but is the only one who
+    can take the evening, which is inside the rest after the morning.
+    """
+    first_year = Doctor(block, 'First Year', 1, carry_hours=0.0)
+    doctors = [first_year] + [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(2)]
+    shifts = [Shift(block, 'Acute 1', 2, 7, 8, [1, 0]), Shift(block, 'Senior', 2, 20, 8, [1])]
+    return first_year, doctors, shifts
+
+
+def make_identical_mornings_case(block, num_doctors):
+    """
+    Every doctor takes one of the identical mornings, so nobody is left for
+    the evening.
+    """
+    doctors = [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(num_doctors)]
+    shifts = [Shift(block, 'Acute 1', 2, 7, 8, [0]) for _ in range(num_doctors)]
+    shifts.append(Shift(block, 'Resus', 2, 20, 8, [0]))
+    return doctors, shifts
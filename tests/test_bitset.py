@@ -0,0 +1,64 @@
+import random
+
+from benchmarks.generator import make_busy_doctors, make_doctors, make_shifts
+from classes.bitset import BitsetTable, doctor_bits
+from classes.block import Block
+from classes.schedule import Schedule
+from classes.shift import link_conflicts
+from classes.timeoff import TimeOff
+
+
+def test_doctor_bits_are_lowest_first():
+    assert list(doctor_bits(0b101001)) == [0, 3, 5]
+    assert list(doctor_bits(0)) == []
+
+
+def test_bitset_filter_matches_python_filter_with_counters():
+    block = Block(1, 28)
+    doctors = make_busy_doctors(block, 40)
+    doctors[0].add_mandatory_time_off(4, 12, 30)
+    shifts = make_shifts(block, 56, senior_nights=1)
+    link_conflicts(shifts)
+    table = BitsetTable(doctors, shifts)
+    schedule = Schedule.__new__(Schedule)
+
+    for shift in shifts:
+        assert table.filter_available_doctors(shift) == schedule.filter_available_doctors(doctors, shift)
+
+
+def test_bitset_filter_matches_python_filter_while_assigning():
+    rng = random.Random(1)
+    block = Block(1, 28)
+    doctors = make_doctors(block, 12)
+    # Assigned in start order, like search
+    shifts = sorted(make_shifts(block, 56, senior_nights=1), key=lambda shift: shift.start)
+    link_conflicts(shifts)
+    table = BitsetTable(doctors, shifts)
+    schedule = Schedule.__new__(Schedule)
+
+    assigned = []
+    for shift in shifts:
+        available = schedule.filter_available_doctors(doctors, shift)
+        assert table.filter_available_doctors(shift) == available
+        if available:
+            doctor = rng.choice(available)
+            shift.assign_doctor(doctor)
+            table.update(doctor)
+            assigned.append(shift)
+        # Undo some assignments like backtracking does
+        if assigned and rng.random() < 0.2:
+            last = assigned.pop()
+            doctor = last.doctor
+            last.unassign_doctor(doctor)
+            table.update(doctor)
+
+
+def test_bitset_engine_builds_same_schedule():
+    block = Block(1, 28)
+    schedules = []
+    for engine in ['python', 'bitset']:
+        doctors = make_doctors(block, 20)
+        doctors[3].requested_timeoff.append(TimeOff(block, 'Doctor 3', 9, 7, 24, mandatory=False))
+        schedule = Schedule(block, doctors, make_shifts(block, 56, senior_nights=1), engine=engine)
+        schedules.append([shift.doctor.name for shift in schedule.schedule])
+    assert schedules[0] == schedules[1]
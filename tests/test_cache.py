@@ -0,0 +1,106 @@
+import pickle
+import shutil
+
+import pytest
+
+import cache
+from cache import CompiledInputs, cache_key, load_inputs
+from classes.block import Block
+
+DOCTORS = '''Name,Seniority,Chief,Carried Hours,Requested Day:Time:Duration,Mandatory Day:Time:Duration,Half Block,Pre Block Hours
+Ben Hong,4,Yes,-12,_,2:23:40 16:19:24 9:7:8,Both,0
+Erena Weathers,3,No,-3,26:15:64 23:19:8,16:19:12,Both,0
+Tim Friedmann,0,No,-13,5:7:24,1:7:12,1,12
+Ana Lopez,1,No,0,20:7:24,_,2,0
+'''
+
+
+def doctor_fields(doctor):
+    return (doctor.name, doctor.seniority, doctor.chief, doctor.carry_hours, doctor.half_block,
+            doctor.pre_block_hours, doctor.weekly_hours, doctor.expected_hours, doctor.expected_night_range,
+            doctor.expected_weekend_range, doctor.actual_hours, list(doctor.timeoff_index.intervals),
+            [(timeoff.start, timeoff.end) for timeoff in doctor.requested_timeoff],
+            [(timeoff.start, timeoff.end) for timeoff in doctor.mandatory_timeoff])
+
+
+def shift_fields(shift):
+    return (shift.location, shift.start_day, shift.start_time, shift.duration, shift.position_preferences,
+            shift.night, shift.weekend, shift.optional, shift.start, shift.end, shift.week,
+            shift.index, shift.conflicts)
+
+
+def test_compiled_inputs_match_parsed_inputs(tmp_path):
+    block = Block(1, 28)
+    doctors_file = tmp_path / 'doctors.csv'
+    shifts_file = tmp_path / 'shifts.csv'
+    doctors_file.write_text(DOCTORS)
+    shutil.copy('../settings/shifts.csv', shifts_file)
+
+    parsed_doctors, parsed_shifts = load_inputs(block, doctors_file, shifts_file, cache_dir=tmp_path)
+    key = cache_key(block, doctors_file, shifts_file)
+    assert (tmp_path / f'{key}.bin').exists()
+    assert not list(tmp_path.glob('*.tmp'))
+
+    doctors, shifts = load_inputs(block, doctors_file, shifts_file, cache_dir=tmp_path)
+    assert [doctor_fields(doctor) for doctor in doctors] == [doctor_fields(doctor) for doctor in parsed_doctors]
+    assert [shift_fields(shift) for shift in shifts] == [shift_fields(shift) for shift in parsed_shifts]
+    with CompiledInputs(tmp_path / f'{key}.bin') as compiled:
+        assert compiled.num_shifts == len(parsed_shifts)
+    assert compiled.map.closed
+
+
+def test_cache_key_changes_with_inputs(tmp_path):
+    block = Block(1, 28)
+    shifts_file = tmp_path / 'shifts.csv'
+    shutil.copy('../settings/shifts.csv', shifts_file)
+    key = cache_key(block, shifts_file)
+
+    assert cache_key(Block(1, 27), shifts_file) != key
+    with open(shifts_file, 'a') as f:
+        f.write('Acute 1,2,7,9,0,False\n')
+    assert cache_key(block, shifts_file) != key
+
+
+def test_cache_misses_after_settings_change(tmp_path, monkeypatch):
+    block = Block(1, 28)
+    config_file = tmp_path / 'config.py'
+    doctors_file = tmp_path / 'doctors.csv'
+    shifts_file = tmp_path / 'shifts.csv'
+    shutil.copy('../settings/config.py', config_file)
+    doctors_file.write_text(DOCTORS)
+    shutil.copy('../settings/shifts.csv', shifts_file)
+    monkeypatch.setattr(cache, 'SETTINGS', [config_file])
+    cache_dir = tmp_path / 'cache'
+
+    load_inputs(block, doctors_file, shifts_file, cache_dir=cache_dir)
+    key = cache_key(block, doctors_file, shifts_file)
+    config_file.write_text(config_file.read_text().replace('Seniority.FOURTH_YEAR: 136', 'Seniority.FOURTH_YEAR: 140'))
+    load_inputs(block, doctors_file, shifts_file, cache_dir=cache_dir)
+
+    assert cache_key(block, doctors_file, shifts_file) != key
+    assert len(list(cache_dir.glob('*.bin'))) == 2
+
+
+def test_unchanged_inputs_are_not_hashed_again(tmp_path, monkeypatch):
+    block = Block(1, 28)
+    doctors_file = tmp_path / 'doctors.csv'
+    shifts_file = tmp_path / 'shifts.csv'
+    doctors_file.write_text(DOCTORS)
+    shutil.copy('../settings/shifts.csv', shifts_file)
+    load_inputs(block, doctors_file, shifts_file, cache_dir=tmp_path)
+
+    def rehash(*args):
+        raise AssertionError('Inputs were hashed again')
+    monkeypatch.setattr(cache, 'cache_key', rehash)
+    doctors, shifts = load_inputs(block, doctors_file, shifts_file, cache_dir=tmp_path)
+    assert len(doctors) == 4
+
+    # Loaded conflicts pickle as the lists link_conflicts builds
+    copies = pickle.loads(pickle.dumps(shifts))
+    assert all(type(copy.conflicts) is list and copy.conflicts == shift.conflicts
+               for copy, shift in zip(copies, shifts))
+
+    with open(shifts_file, 'a') as f:
+        f.write('Acute 1,2,7,9,0,False\n')
+    with pytest.raises(AssertionError, match='hashed again'):
+        load_inputs(block, doctors_file, shifts_file, cache_dir=tmp_path)
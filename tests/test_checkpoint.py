@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from classes.block import Block
+from classes.control import RunControl
+from classes.checkpoint import Checkpoint
+from classes.schedule import Schedule
+from tests.cases import make_backjump_case, make_identical_mornings_case
+
+
+def test_checkpoint_appends_changed_frames(tmp_path):
+    path = tmp_path / 'search.checkpoint'
+    checkpoint = Checkpoint(path, compact_lines=3)
+    counters = {'nodes': 0, 'backtracks': 0, 'backjumps': 0}
+    checkpoint.save([[0, 1, [], True, [], False], [1, 0, [2], True, [], False]], counters)
+    checkpoint.save([[0, 1, [], True, [], False], [1, 2, [], True, [], False]], counters)
+    with open(path, 'a') as f:
+        f.write('{"keep": 0, "fra')
+
+    records = [json.loads(line) for line in open(path).readlines()[:2]]
+    assert [record['keep'] for record in records] == [0, 1]
+    assert Checkpoint(path).load()[0] == [[0, 1, [], True, [], False], [1, 2, [], True, [], False]]
+
+    checkpoint.save([[0, 1, [], True, [], False]], counters)
+    checkpoint.save([[0, 2, [], True, [], False]], counters)
+    assert len(open(path).readlines()) == 1
+    assert Checkpoint(path).load()[0] == [[0, 2, [], True, [], False]]
+
+
+def test_resumed_search_matches_uninterrupted_search(tmp_path):
+    block = Block(1, 28)
+    cases = [
+        (lambda: make_identical_mornings_case(block, 3), {}),
+        (lambda: make_backjump_case(block)[1:], {}),
+        (lambda: make_backjump_case(block)[1:], {'backjump': True}),
+        (lambda: make_backjump_case(block)[1:], {'propagate': True, 'order': 'mrv'}),
+    ]
+    for make_case, options in cases:
+        doctors, shifts = make_case()
+        expected = Schedule(block, doctors, shifts, **options)
+        expected_doctors = [doctors.index(shift.doctor) if shift.doctor else None for shift in shifts]
+
+        for node_limit in range(1, expected.nodes):
+            path = tmp_path / f'{node_limit}.checkpoint'
+            doctors, shifts = make_case()
+            control = RunControl(checkpoint=path, checkpoint_nodes=1)
+            stopped = Schedule(block, doctors, shifts, node_limit=node_limit, control=control, **options)
+            assert stopped.stopped
+
+            doctors, shifts = make_case()
+            resumed = Schedule(block, doctors, shifts, control=RunControl(checkpoint=path, resume=True), **options)
+            assert resumed.nodes == expected.nodes
+            assert resumed.backtracks == expected.backtracks
+            assert [doctors.index(shift.doctor) if shift.doctor else None for shift in shifts] == expected_doctors
+            assert not path.exists()
+
+
+def test_saves_after_torn_line_are_loaded(tmp_path):
+    path = tmp_path / 'search.checkpoint'
+    checkpoint = Checkpoint(path)
+    for nodes in range(1, 3):
+        checkpoint.save([[0, nodes, [], True, [], False]], {'nodes': nodes})
+
+    # Each run is killed while appending, then resumed
+    for resume in range(2):
+        with open(path, 'a') as f:
+            f.write('{"keep": 0, "fra')
+        checkpoint = Checkpoint(path)
+        frames, counters = checkpoint.load()
+        assert counters['nodes'] == 2 + resume * 7
+        for nodes in range(counters['nodes'] + 1, counters['nodes'] + 8):
+            checkpoint.save([[0, nodes, [], True, [], False]], {'nodes': nodes})
+        assert Checkpoint(path).load() == ([[0, nodes, [], True, [], False]], {'nodes': nodes})
+
+
+def test_line_torn_inside_a_character_is_ignored(tmp_path):
+    path = tmp_path / 'search.checkpoint'
+    checkpoint = Checkpoint(path)
+    checkpoint.save([[0, 1, [], True, [], False]], {'nodes': 1})
+    torn = json.dumps({'keep': 0, 'frames': [], 'counters': {'note': 'é'}}, ensure_ascii=False).encode()
+    with open(path, 'ab') as f:
+        f.write(torn[:torn.index('é'.encode()) + 1])
+
+    assert Checkpoint(path).load() == ([[0, 1, [], True, [], False]], {'nodes': 1})
+
+    # Only the last line can be torn
+    with open(path, 'ab') as f:
+        f.write(b'\n' + json.dumps({'keep': 0, 'frames': [], 'counters': {}}).encode() + b'\n')
+    with pytest.raises(ValueError):
+        Checkpoint(path).load()
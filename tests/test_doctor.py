@@ -1,5 +1,26 @@
+from classes.block import Block
+from classes.doctor import Doctor
+from classes.shift import Shift, link_conflicts
+from classes.timeoff import TimeOff
+
+
 def test_doctor_working_second_block_gets_preblock_hours_set_to_third_week():
-    pass
+    block = Block(1, 28)
+    requested = [TimeOff(block, 'Second Half', 20, 7, 24, mandatory=False)]
+    doctor = Doctor(block, 'Second Half', 0, carry_hours=-20.0, half_block='2',
+                    pre_block_hours=20, requested_timeoff=requested)
+    week = block.week(block.hour(15, 7))
+
+    assert doctor.weekly_hours[0] == 0
+    assert doctor.weekly_hours[week] == 20
+    assert len(doctor.weekly_hours) == block.num_weeks()
+
+    shift = Shift(block, 'Acute 1', 16, 7, 8, [0])
+    link_conflicts([shift])
+    shift.assign_doctor(doctor)
+    assert doctor.weekly_hours[week] == 28
+    shift.unassign_doctor(doctor)
+    assert doctor.weekly_hours[week] == 20
 
 
 def test_doctor_with_first_half_block_requests_less_than_48_hours():
@@ -8,3 +29,56 @@ def test_doctor_with_first_half_block_requests_less_than_48_hours():
 
 def test_doctor_with_negative_carry_needs_to_work_less_hours():
     pass
+
+
+def test_removing_shift_after_string_restores_string():
+    block = Block(1, 28)
+    doctor = Doctor(block, 'Off Service', 0, carry_hours=0.0)
+    nights = [Shift(block, 'Acute 1', day, 19, 8, [0]) for day in [5, 6]]
+    day = Shift(block, 'Acute 1', 8, 7, 8, [0])
+    link_conflicts(nights + [day])
+    for shift in nights + [day]:
+        shift.assign_doctor(doctor)
+    assert doctor.consecutive_night_shifts == 0
+    assert doctor.consecutive_weekend_shifts == 0
+
+    day.unassign_doctor(doctor)
+
+    assert doctor.consecutive_night_shifts == 2
+    # Friday night is not a weekend shift, Saturday night is
+    assert doctor.consecutive_weekend_shifts == 1
+    assert doctor.actual_nights == 2
+    assert doctor.blocked == {}
+
+
+def test_doctor_and_shift_have_no_instance_dict():
+    block = Block(1, 28)
+    doctor = Doctor(block, 'Off Service', 0, carry_hours=0.0)
+    shift = Shift(block, 'Acute 1', 2, 7, 8, [0])
+
+    assert not hasattr(doctor, '__dict__')
+    assert not hasattr(shift, '__dict__')
+    assert 'Off Service' in repr(doctor)
+
+
+def test_night_string_counts_nights_on_both_sides_of_shift():
+    block = Block(1, 28)
+    doctor = Doctor(block, 'Off Service', 0, carry_hours=0.0)
+    nights = {day: Shift(block, 'Acute 1', day, 19, 8, [0]) for day in range(8, 14)}
+    evening = Shift(block, 'Acute 2', 10, 11, 8, [0])
+    link_conflicts(list(nights.values()) + [evening])
+    # Filled out of start order
+    for day in [11, 12, 8, 9]:
+        nights[day].assign_doctor(doctor)
+    assert doctor.consecutive_night_shifts == 4
+    assert doctor.can_work_more_night_shifts(nights[10])
+
+    nights[13].assign_doctor(doctor)
+    assert not doctor.can_work_more_night_shifts(nights[10])
+
+    # A day shift between the strings breaks the string that ends the timeline
+    nights[13].unassign_doctor(doctor)
+    evening.assign_doctor(doctor)
+    assert doctor.consecutive_night_shifts == 2
+    evening.unassign_doctor(doctor)
+    assert doctor.consecutive_night_shifts == 4
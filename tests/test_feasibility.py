@@ -0,0 +1,61 @@
+from classes.block import Block
+from classes.doctor import Doctor
+from classes.feasibility import FlowNetwork, analyze
+from classes.schedule import Schedule
+from classes.shift import Shift
+
+
+def test_max_flow_reroutes_greedy_flow():
+    network = FlowNetwork()
+    for start, end in [('source', 'a'), ('source', 'b'), ('a', 'x'), ('a', 'y'), ('b', 'x'), ('x', 'sink'), ('y', 'sink')]:
+        network.add_edge(start, end, 1)
+    # a takes x first, b can only fill x once a moves to y
+    flow = network.augment(['source', 'a', 'x', 'sink'])
+    assert network.max_flow('source', 'sink', flow) == 2
+
+
+def test_shift_during_conference_is_short_of_doctors():
+    block = Block(1, 28)
+    doctors = [Doctor(block, f'Second Year {i}', 2, carry_hours=0.0) for i in range(5)]
+    # Wednesday conference starts at 7am on day 3
+    shifts = [Shift(block, 'Acute 1', 2, 7, 9, [2]), Shift(block, 'Acute 2', 2, 23, 9, [1, 2])]
+
+    shortages = analyze(block, doctors, shifts)
+
+    assert [(shortage.kind, shortage.shift) for shortage in shortages] == [('doctors', shifts[1])]
+    assert repr(shortages[0]) == 'Day 2 Acute 2 at 23:00 is short of doctors for FIRST_YEAR, SECOND_YEAR'
+
+
+def test_senior_nights_past_night_limits_are_short():
+    block = Block(1, 28)
+    # Fourth years work at most 5 nights
+    doctors = [Doctor(block, 'Fourth Year', 4, carry_hours=0.0), Doctor(block, 'Off Service', 0, carry_hours=0.0)]
+    shifts = [Shift(block, 'Resus Senior', day, 19, 8, [4]) for day in [1, 2, 4, 5, 8, 9]]
+
+    shortages = analyze(block, doctors, shifts)
+
+    assert len(shortages) == 1
+    assert shortages[0].kind == 'nights'
+
+
+def test_feasible_input_has_no_shortages():
+    block = Block(1, 28)
+    doctors = [Doctor(block, f'Doctor {i}', i % 5, carry_hours=0.0) for i in range(20)]
+    shifts = []
+    for day in range(block.start, block.end + 1):
+        shifts.append(Shift(block, 'Acute 1', day, 7, 9, [0, 1, 2, 3, 4]))
+        shifts.append(Shift(block, 'Resus Senior', day, 19, 12, [4, 3]))
+
+    assert analyze(block, doctors, shifts) == []
+
+
+def test_schedule_skips_search_when_input_is_short():
+    block = Block(1, 28)
+    doctors = [Doctor(block, 'Off Service', 0, carry_hours=0.0)]
+    shifts = [Shift(block, 'Acute 1', 2, 7, 8, [0]), Shift(block, 'Senior', 2, 19, 8, [4])]
+
+    schedule = Schedule(block, doctors, shifts, check_feasibility=True)
+
+    assert schedule.schedule is None
+    assert schedule.nodes == 0
+    assert [shortage.shift for shortage in schedule.shortages] == [shifts[1]]
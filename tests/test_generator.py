@@ -0,0 +1,41 @@
+from benchmarks.generator import LADDER, generate, write_inputs
+from classes.schedule import Schedule
+from parse import parse_doctors, parse_shifts
+
+
+def test_generated_cases_parse(tmp_path):
+    for name, case in LADDER.items():
+        block, doctors, shifts = generate(seed=0, **case['options'])
+        directory = tmp_path / name.replace(' ', '_')
+        directory.mkdir()
+        doctors_file, shifts_file = write_inputs(directory, doctors, shifts)
+
+        parsed_doctors = parse_doctors(block, doctors_file)
+        parsed_shifts = parse_shifts(block, shifts_file)
+
+        assert [(doctor.name, doctor.seniority) for doctor in parsed_doctors] == \
+            [(doctor.name, doctor.seniority) for doctor in doctors]
+        for parsed, doctor in zip(parsed_doctors, doctors):
+            for kind in ['requested_timeoff', 'mandatory_timeoff']:
+                assert sorted((timeoff.start, timeoff.end) for timeoff in getattr(parsed, kind)) == \
+                    sorted((timeoff.start, timeoff.end) for timeoff in getattr(doctor, kind))
+        assert [(shift.location, shift.start, shift.end, shift.position_preferences) for shift in parsed_shifts] == \
+            [(shift.location, shift.start, shift.end, shift.position_preferences) for shift in shifts]
+
+
+def test_ladder_statuses_hold_for_seed_0():
+    backtracks = {}
+    for name, case in LADDER.items():
+        if case['expected'] is None:
+            continue
+        schedule = Schedule(*generate(seed=0, **case['options']), node_limit=20000, check_feasibility=True)
+        backtracks[name] = schedule.backtracks
+        if schedule.schedule is not None:
+            status = 'complete'
+        elif schedule.stopped:
+            status = 'stopped'
+        else:
+            status = 'impossible'
+        assert status == case['expected'], f"{name} is {status}"
+
+    assert backtracks['medium'] > 0
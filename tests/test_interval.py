@@ -0,0 +1,97 @@
+import copy
+import pickle
+
+from classes.block import Block
+from classes.interval import IntervalIndex
+from classes.shift import Shift, link_conflicts
+from classes.timeoff import TimeOff
+from parse import parse_shifts
+
+
+def test_overlaps_ignores_touching_intervals():
+    index = IntervalIndex()
+    index.push(10, 20)
+    assert index.overlaps(15, 16)
+    assert index.overlaps(5, 11)
+    assert index.overlaps(0, 30)
+    assert not index.overlaps(0, 10)
+    assert not index.overlaps(20, 30)
+
+
+def test_overlaps_finds_long_interval_started_well_before():
+    index = IntervalIndex()
+    index.push(0, 72)
+    for start in range(30, 60, 10):
+        index.push(start, start + 2)
+    assert index.overlaps(65, 66)
+
+
+def test_pop_removes_most_recently_pushed():
+    index = IntervalIndex()
+    index.push(10, 20)
+    index.push(40, 50)
+    index.push(10, 20)
+    assert index.pop() == (10, 20)
+    assert index.pop() == (40, 50)
+    assert not index.overlaps(40, 50)
+    assert index.overlaps(10, 20)
+    assert len(index) == 1
+
+
+def test_shift_overlaps_timeoff_only_on_same_day():
+    block = Block(1, 28)
+    shift = Shift(block, 'Acute 1', 2, 10, 9, [0])
+    assert shift.overlaps_timeoff(TimeOff(block, 'Doctor', 2, 15, 8))
+    assert not shift.overlaps_timeoff(TimeOff(block, 'Doctor', 3, 15, 8))
+
+
+def test_night_shift_overlaps_next_morning():
+    block = Block(1, 28)
+    shift = Shift(block, 'Acute 1', 2, 19, 12, [0])
+    assert shift.end == block.hour(3, 7)
+    assert shift.overlaps_timeoff(TimeOff(block, 'Doctor', 3, 6, 8))
+    assert not shift.overlaps_timeoff(TimeOff(block, 'Doctor', 3, 7, 8))
+
+
+def test_conflicts_cover_overlap_and_rest():
+    block = Block(1, 28)
+    # Ends day 3 at 7am, rests until 7pm
+    shift = Shift(block, 'Acute 1', 2, 19, 12, [0])
+    overlapping = Shift(block, 'Acute 2', 3, 6, 8, [0])
+    resting = Shift(block, 'PIT', 3, 18, 8, [0])
+    free = Shift(block, 'Resus', 3, 19, 8, [0])
+    last = Shift(block, 'Senior', 28, 19, 12, [0])
+
+    link_conflicts([free, last, resting, overlapping, shift])
+
+    assert shift.conflicts == [overlapping.index, resting.index]
+    assert free.index not in shift.conflicts
+    assert overlapping.conflicts == [shift.index, resting.index, free.index]
+    assert last.conflicts == []
+
+
+def test_weeks_start_sunday_at_7am():
+    block = Block(1, 28)
+    assert block.week(block.hour(1, 7)) == 0
+    assert block.week(block.hour(7, 6)) == 0
+    assert block.week(block.hour(7, 7)) == 1
+    assert block.week(block.hour(28, 7)) == 4
+
+
+def test_ending_after_keeps_intervals_still_running():
+    index = IntervalIndex()
+    index.push(0, 10)
+    index.push(5, 30)
+    index.push(40, 50)
+    assert index.ending_after(10) == ((5, 30), (40, 50))
+
+
+def test_linked_shifts_pickle_at_settings_size():
+    block = Block(1, 28)
+    shifts = parse_shifts(block, '../settings/shifts.csv')
+
+    copies = pickle.loads(pickle.dumps(shifts))
+    copied = copy.deepcopy(shifts)
+
+    assert [shift.conflicts for shift in copies] == [shift.conflicts for shift in shifts]
+    assert [shift.index for shift in copied] == [shift.index for shift in shifts]
@@ -0,0 +1,23 @@
+import logging
+
+from classes.block import Block
+from classes.doctor import Doctor
+from classes.log import TRACE
+from classes.shift import Shift, link_conflicts
+
+
+def test_assignments_are_logged_only_at_trace(caplog):
+    block = Block(1, 28)
+    doctor = Doctor(block, 'Off Service', 0, carry_hours=0.0)
+    shift = Shift(block, 'Acute 1', 2, 7, 8, [0])
+    link_conflicts([shift])
+
+    with caplog.at_level(logging.DEBUG):
+        shift.assign_doctor(doctor)
+        shift.unassign_doctor(doctor)
+    assert caplog.records == []
+
+    with caplog.at_level(TRACE):
+        shift.assign_doctor(doctor)
+    assert [record.levelname for record in caplog.records] == ['TRACE']
+    assert caplog.records[0].getMessage().endswith('to Doctor:Off Service')
@@ -0,0 +1,17 @@
+from classes.nogood import NogoodStore
+
+
+def test_store_evicts_least_recently_used():
+    store = NogoodStore(max_entries=2)
+    first = store.digest((0, 'first'))
+    second = store.digest((1, 'second'))
+    third = store.digest((2, 'third'))
+    store.add(first)
+    store.add(second)
+    assert store.contains(first)
+    store.add(third)
+
+    assert not store.contains(second)
+    assert store.contains(first)
+    assert store.contains(third)
+    assert store.stats() == {'entries': 2, 'max_entries': 2, 'hits': 3, 'misses': 1, 'evictions': 1}
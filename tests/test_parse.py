@@ -1,7 +1,7 @@
 import pytest
 
 from classes.block import Block
-from parse import parse_doctors, parse_shifts
+from parse import InputError, parse_doctors, parse_shifts
 from settings.config import Seniority, Locations
 
 
@@ -38,23 +38,39 @@ def test_parse_doctor_with_skipped_row():
 
 def test_parse_doctor_invalid_row():
     block = Block(1, 28)
-    with pytest.raises(AssertionError) as e:
+    with pytest.raises(InputError) as e:
         parse_doctors(block, 'inputs/doctors_invalid_row.csv')
-    assert e.value.args[0] == 'Row found with empty string and null value'
+    assert e.value.errors == [(3, None, 'Row found with empty string and null value')]
 
 
 def test_parse_doctor_with_empty_requested_timeoff():
     block = Block(1, 28)
-    with pytest.raises(AssertionError) as e:
+    with pytest.raises(InputError) as e:
         parse_doctors(block, 'inputs/doctors_empty_timeoff.csv')
-    assert e.value.args[0] == "Row value is empty string, should either be explicitly null ('_') or a non-empty value"
+    assert e.value.errors == [(2, 'Requested Day:Time:Duration', "Row value is empty string, should either be explicitly null ('_') or a non-empty value")]
 
 
 def test_parse_doctor_invalid_requested_timeoff_format():
     block = Block(1, 28)
-    with pytest.raises(AssertionError) as e:
+    with pytest.raises(InputError) as e:
         parse_doctors(block, 'inputs/doctors_invalid_timeoff.csv') # 13:25:8
-    assert 'Incorrect format for timeoff' in e.value.args[0]
+    [(row, column, message)] = e.value.errors
+    assert (row, column) == (2, 'Mandatory Day:Time:Duration')
+    assert 'Incorrect format for timeoff' in message
+
+
+def test_parse_doctor_collects_every_error():
+    block = Block(1, 28)
+    with pytest.raises(InputError) as e:
+        parse_doctors(block, 'inputs/doctors_invalid_cells.csv')
+    assert [(row, column) for row, column, _ in e.value.errors] == [
+        (2, 'Seniority'),
+        (3, 'Chief'),
+        (4, 'Mandatory Day:Time:Duration'),
+        (5, None),
+    ]
+    assert 'minimum carried hours' in e.value.errors[-1][2]
+    assert 'row 4, Mandatory Day:Time:Duration' in str(e.value)
 
 
 def test_parse_shifts_succeeds():
@@ -72,8 +88,26 @@ def test_parse_shifts_succeeds():
 
 
 def test_parse_shifts_with_skipped_row():
-    pass
+    block = Block(1, 28)
+    shifts = parse_shifts(block, 'inputs/shifts_empty_row.csv')
+    assert len(shifts) == 2
+    assert shifts[1].optional
 
 
 def test_parse_shifts_invalid_row():
-    pass
+    block = Block(1, 28)
+    with pytest.raises(InputError) as e:
+        parse_shifts(block, 'inputs/shifts_invalid_row.csv')
+    assert [(row, column) for row, column, _ in e.value.errors] == [
+        (3, 'Location'),
+        (3, 'Duration'),
+        (5, 'Position Preferences'),
+        (5, 'Optional'),
+    ]
+
+
+def test_parse_shifts_checks_rows_across_columns():
+    block = Block(1, 28)
+    with pytest.raises(InputError) as e:
+        parse_shifts(block, 'inputs/shifts_late.csv')
+    assert e.value.errors[0][:2] == (2, None)
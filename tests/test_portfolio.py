@@ -0,0 +1,94 @@
+import os
+
+from classes.block import Block
+from classes.control import RunControl
+from classes.doctor import Doctor
+from classes import portfolio
+from classes.portfolio import Portfolio
+from classes.schedule import Schedule
+from classes.shift import Shift
+from tests.cases import make_daily_case
+
+
+def test_portfolio_replays_winning_schedule():
+    block = Block(1, 28)
+    doctors, shifts = make_daily_case(block)
+    portfolio = Portfolio(block, doctors, shifts, workers=2, seed=1)
+
+    assert portfolio.winner is not None
+    assert len(portfolio.stats) == 2
+    assert len(portfolio.schedule) == len(shifts)
+    assert all(shift.doctor is not None for shift in shifts)
+    assert sum(len(doctor.shifts) for doctor in doctors) == len(shifts)
+
+
+def test_portfolio_takes_time_limit_from_control():
+    block = Block(1, 28)
+    doctors, shifts = make_daily_case(block)
+    portfolio = Portfolio(block, doctors, shifts, workers=2, seed=1, control=RunControl(time_limit=60))
+
+    assert portfolio.winner is not None
+    assert all(shift.doctor is not None for shift in shifts)
+
+
+def test_portfolio_winner_is_first_to_complete_in_its_round():
+    block = Block(1, 28)
+    doctors, shifts = make_daily_case(block)
+    portfolio = Portfolio(block, doctors, shifts, workers=3, seed=7, round_nodes=16)
+    names = [shift.doctor.name for shift in portfolio.schedule]
+    budget = 16 * 2 ** (portfolio.rounds - 1)
+    assert portfolio.rounds > 1
+
+    # Nobody completed a round earlier, and no worker before the winner did in its round
+    for index, seed in enumerate(portfolio.seeds):
+        for node_limit in [budget // 2, budget]:
+            doctors, shifts = make_daily_case(block)
+            schedule = Schedule(block, doctors, shifts, seed=seed, node_limit=node_limit)
+            complete = schedule.schedule is not None
+            if node_limit < budget or index < portfolio.winner:
+                assert not complete
+            elif index == portfolio.winner:
+                assert complete
+                assert names == [shift.doctor.name for shift in schedule.schedule]
+
+
+def exit_without_report(index, *args):
+    # As if killed, for memory for example
+    os._exit(1)
+
+
+def test_portfolio_reports_dead_worker(monkeypatch):
+    block = Block(1, 28)
+    doctors, shifts = make_daily_case(block)
+    monkeypatch.setattr(portfolio, 'run_worker', exit_without_report)
+    monkeypatch.setattr(portfolio, 'POLL_SECONDS', 0.1)
+
+    search = Portfolio(block, doctors, shifts, workers=2)
+
+    assert search.schedule is None
+    assert [stats['status'] for stats in search.stats] == ['failed', 'failed']
+
+
+def test_portfolio_stops_once_a_worker_proves_there_is_no_schedule():
+    block = Block(1, 28)
+    # Nobody is senior enough
+    doctors = [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(3)]
+    shifts = [Shift(block, 'Acute 1', 2, 7, 8, [0]), Shift(block, 'Senior', 2, 9, 8, [4])]
+
+    portfolio = Portfolio(block, doctors, shifts, workers=2, round_nodes=16)
+
+    assert portfolio.impossible
+    assert portfolio.schedule is None
+    assert portfolio.rounds == 1
+    assert all(shift.doctor is None for shift in shifts)
+
+
+def test_portfolio_node_limit_caps_nodes_across_rounds():
+    block = Block(1, 28)
+    doctors, shifts = make_daily_case(block)
+    portfolio = Portfolio(block, doctors, shifts, workers=2, seed=7, round_nodes=16, node_limit=40)
+
+    # Rounds of 16 and 24 nodes
+    assert portfolio.schedule is None
+    assert portfolio.rounds == 2
+    assert all(stats['nodes'] == 24 for stats in portfolio.stats)
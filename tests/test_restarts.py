@@ -0,0 +1,32 @@
+from classes.block import Block
+from classes.restarts import Restarts, luby
+from tests.cases import make_daily_case, make_identical_mornings_case
+
+
+def test_luby_sequence():
+    assert [luby(i) for i in range(1, 16)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+
+
+def test_restarts_repeat_for_seed():
+    block = Block(1, 28)
+    schedules = []
+    for seed in [3, 3, 4]:
+        doctors, shifts = make_daily_case(block)
+        restarts = Restarts(block, doctors, shifts, seed=seed)
+        assert len(restarts.schedule) == len(shifts)
+        schedules.append([shift.doctor.name for shift in shifts])
+
+    assert schedules[0] == schedules[1]
+    assert schedules[0] != schedules[2]
+
+
+def test_restarts_grow_budget_until_search_is_exhausted():
+    block = Block(1, 28)
+    doctors, shifts = make_identical_mornings_case(block, 4)
+    restarts = Restarts(block, doctors, shifts, cutoffs='geometric', base=1)
+
+    assert restarts.schedule is None
+    assert restarts.exhausted
+    assert [stats['budget'] for stats in restarts.attempts] == [1, 2, 4, 8, 16, 32, 64]
+    assert [stats['status'] for stats in restarts.attempts] == ['stopped'] * 6 + ['impossible']
+    assert all(shift.doctor is None for shift in shifts)
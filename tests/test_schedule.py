@@ -1,3 +1,335 @@
+import inspect
+import random
+import sys
+from functools import cmp_to_key
+
+import pytest
+
+from benchmarks.generator import make_doctors, make_shifts
+from classes.block import Block
+from classes.control import RunControl
+from classes.doctor import Doctor
+from classes.schedule import Schedule, compare_doctors
+from classes.shift import Shift
+from classes.timeoff import TimeOff
+from tests.cases import make_backjump_case, make_identical_mornings_case, make_nogood_case, make_scarce_shift_case
+
+
 def test_doctor_with_requested_timeoff_is_deprioritized():
-    pass
+    block = Block(1, 28)
+    requested = Doctor(block, 'Requested', 0, carry_hours=0.0,
+                       requested_timeoff=[TimeOff(block, 'Requested', 2, 7, 24, mandatory=False)])
+    other = Doctor(block, 'Other', 0, carry_hours=0.0)
+    shift = Shift(block, 'Acute 1', 2, 16, 8, [0])
+    schedule = Schedule.__new__(Schedule)
+
+    assert schedule.sort_doctors([other, requested], shift) == [requested, other]
+    assert schedule.best_doctor([other, requested], shift) is other
+
+
+def test_rank_orders_doctors_like_comparator():
+    rng = random.Random(0)
+    block = Block(1, 28)
+    doctors = [Doctor(block, f'Doctor {i}', i % 5, carry_hours=0.0) for i in range(60)]
+    for doctor in doctors:
+        doctor.consecutive_night_shifts = rng.randint(0, 1)
+        doctor.consecutive_weekend_shifts = rng.randint(0, 1)
+        doctor.actual_weekends = rng.randint(0, 1)
+        doctor.actual_nights = rng.randint(0, 1)
+        doctor.location_hours['Acute 1'] = rng.choice([0, 8])
+    shift = Shift(block, 'Acute 1', 2, 19, 12, [4, 3, 2, 1, 0])
+    schedule = Schedule.__new__(Schedule)
+
+    expected = sorted(doctors, key=cmp_to_key(lambda doctor1, doctor2: compare_doctors(doctor1, doctor2, shift)))
+    assert schedule.sort_doctors(doctors, shift) == expected
+    assert schedule.best_doctor(doctors, shift) is expected[-1]
+
+
+def test_search_backtracks_to_next_best_doctor():
+    """
+    The fourth year is preferred for the first shift, but is the only one who
+    can cover the overlapping second shift, so search must backtrack.
+    """
+    block = Block(1, 28)
+    off_service = Doctor(block, 'Off Service', 0, carry_hours=0.0)
+    fourth_year = Doctor(block, 'Fourth Year', 4, carry_hours=0.0)
+    first = Shift(block, 'Acute 1', 2, 16, 8, [4, 0])
+    second = Shift(block, 'Senior', 2, 16, 8, [4])
+
+    schedule = Schedule(block, [off_service, fourth_year], [first, second])
+
+    assert schedule.schedule == [first, second]
+    assert first.doctor is off_service
+    assert second.doctor is fourth_year
+
+
+def test_search_returns_none_when_shift_cannot_be_filled():
+    block = Block(1, 28)
+    doctor = Doctor(block, 'Off Service', 0, carry_hours=0.0)
+    first = Shift(block, 'Acute 1', 2, 16, 8, [0])
+    second = Shift(block, 'Acute 2', 2, 16, 8, [0])
+
+    schedule = Schedule(block, [doctor], [first, second])
+
+    assert schedule.schedule is None
+    assert first.doctor is None
+    assert doctor.shifts == []
+
+
+def test_search_does_not_recurse_per_shift():
+    block = Block(1, 28)
+    num_shifts = 200
+    doctors = [Doctor(block, f'Doctor {i}', 0, carry_hours=0.0) for i in range(num_shifts)]
+    shifts = [Shift(block, 'Acute 1', 1 + i % 28, 7 + i % 3, 8, [0]) for i in range(num_shifts)]
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 100)
+    try:
+        schedule = Schedule(block, doctors, shifts)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert len(schedule.schedule) == num_shifts
+    assert all(shift.doctor is not None for shift in shifts)
+
+
+def test_search_fills_more_shifts_than_recursion_limit():
+    block = Block(1, 28)
+    num_shifts = max(2000, sys.getrecursionlimit() + 500)
+    doctors = make_doctors(block, num_shifts * 3 // 20)
+    shifts = make_shifts(block, num_shifts)
+
+    schedule = Schedule(block, doctors, shifts, node_limit=num_shifts + 1000)
+
+    assert len(schedule.schedule) == num_shifts
+    assert schedule.depth == num_shifts
+
+
+def test_propagation_builds_same_schedule():
+    block = Block(1, 28)
+    schedules = []
+    for propagate in [False, True]:
+        doctors = [Doctor(block, f'Doctor {i}', i % 5, carry_hours=0.0) for i in range(20)]
+        shifts = []
+        for day in range(block.start, block.end + 1):
+            shifts.append(Shift(block, 'Acute 1', day, 7, 9, [0, 1, 2, 3, 4]))
+            shifts.append(Shift(block, 'Resus Senior', day, 19, 12, [4, 3]))
+        schedule = Schedule(block, doctors, shifts, propagate=propagate)
+        schedules.append([shift.doctor.name for shift in schedule.schedule])
+    assert schedules[0] == schedules[1]
+
+
+def test_propagation_fails_before_search_when_shift_has_no_doctors():
+    block = Block(1, 28)
+    doctors = [Doctor(block, 'Fourth Year', 4, carry_hours=0.0)]
+    # Wednesday conference starts at 7am on day 3
+    shifts = [Shift(block, 'Acute 1', 1, 7, 9, [4]), Shift(block, 'Senior', 2, 23, 9, [4])]
+
+    schedule = Schedule(block, doctors, shifts, propagate=True)
+
+    assert schedule.schedule is None
+    assert schedule.nodes == 0
+
+
+def test_propagation_backtracks_when_later_shift_loses_last_doctor():
+    block = Block(1, 28)
+    off_service = Doctor(block, 'Off Service', 0, carry_hours=0.0)
+    first_year = Doctor(block, 'First Year', 1, carry_hours=0.0)
+    first = Shift(block, 'Acute 1', 2, 16, 8, [1, 0])
+    second = Shift(block, 'Acute 2', 2, 18, 8, [1])
+
+    schedule = Schedule(block, [off_service, first_year], [first, second], propagate=True)
+
+    assert second.doctor is first_year
+    # The first year on the first shift is rejected without visiting the second
+    assert schedule.nodes == 3
+
+
+def test_backjump_skips_unrelated_shifts():
+    block = Block(1, 28)
+    first_year, doctors, shifts = make_backjump_case(block)
+    schedule = Schedule(block, doctors, shifts, backjump=True)
+
+    assert schedule.backjumps == 2
+    assert shifts[0].doctor is not first_year
+    assert shifts[3].doctor is first_year
+
+    _, doctors, shifts = make_backjump_case(block)
+    chronological = Schedule(block, doctors, shifts)
+    assert schedule.nodes < chronological.nodes
+
+
+def test_backjump_stops_when_no_assignment_caused_failure():
+    block = Block(1, 28)
+    doctors = [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(3)]
+    shifts = [Shift(block, 'Acute 1', 2, 7, 8, [0]), Shift(block, 'Senior', 2, 9, 8, [4])]
+
+    schedule = Schedule(block, doctors, shifts, backjump=True)
+
+    assert schedule.schedule is None
+    assert schedule.nodes == 1
+    assert all(shift.doctor is None for shift in shifts)
+    for doctor in doctors:
+        assert doctor.shifts == [] and doctor.timeline == [] and doctor.blocked == {}
+        assert doctor.weekly_hours == [0] * len(doctor.weekly_hours)
+
+
+def test_nogoods_skip_states_that_already_failed():
+    block = Block(1, 28)
+    doctors, shifts = make_nogood_case(block)
+    schedule = Schedule(block, doctors, shifts, nogood_limit=100)
+
+    assert schedule.schedule is None
+    assert schedule.nogoods.hits == 2
+
+    doctors, shifts = make_nogood_case(block)
+    uncached = Schedule(block, doctors, shifts)
+    assert schedule.nodes < uncached.nodes
+
+
+def test_mrv_fills_scarce_shift_first():
+    block = Block(1, 28)
+    first_year, doctors, shifts = make_scarce_shift_case(block)
+    schedule = Schedule(block, doctors, shifts, order='mrv')
+
+    assert [shift.location for shift in schedule.schedule] == ['Senior', 'Acute 1']
+    assert schedule.schedule[0].doctor is first_year
+    assert schedule.nodes == 2
+
+    _, doctors, shifts = make_scarce_shift_case(block)
+    chronological = Schedule(block, doctors, shifts)
+    assert chronological.nodes == 3
+
+
+def test_mrv_matches_chronological_on_feasible_block():
+    block = Block(1, 28)
+    chronological = Schedule(block, make_doctors(block, 25), make_shifts(block, 80, senior_nights=2),
+                             node_limit=2000)
+    mrv = Schedule(block, make_doctors(block, 25), make_shifts(block, 80, senior_nights=2), order='mrv',
+                   node_limit=2000)
+
+    assert chronological.schedule is not None
+    assert mrv.schedule is not None
+    assert mrv.nodes <= chronological.nodes
+
+
+def test_mrv_builds_valid_schedule():
+    block = Block(1, 28)
+    doctors = [Doctor(block, f'Doctor {i}', i % 5, carry_hours=0.0) for i in range(20)]
+    shifts = []
+    for day in range(block.start, block.end + 1):
+        shifts.append(Shift(block, 'Acute 1', day, 7, 9, [0, 1, 2, 3, 4]))
+        shifts.append(Shift(block, 'Resus Senior', day, 19, 12, [4, 3]))
+
+    schedule = Schedule(block, doctors, shifts, order='mrv', propagate=True, backjump=True)
+
+    assert len(schedule.schedule) == len(shifts)
+    by_index = {shift.index: shift for shift in shifts}
+    for doctor in doctors:
+        assert all(by_index[other].doctor is not doctor for shift in doctor.shifts for other in shift.conflicts)
+        assert max(doctor.weekly_hours) <= 60
+        assert doctor.actual_nights <= doctor.expected_night_range[1]
+        assert doctor.actual_weekends <= doctor.expected_weekend_range[1]
+
+
+def test_symmetry_tries_each_set_of_doctors_once():
+    block = Block(1, 28)
+    doctors, shifts = make_identical_mornings_case(block, 4)
+    schedule = Schedule(block, doctors, shifts, symmetry=True)
+
+    assert schedule.schedule is None
+    assert schedule.nodes == 4
+
+    doctors, shifts = make_identical_mornings_case(block, 4)
+    assert Schedule(block, doctors, shifts).nodes == 64
+
+
+def test_symmetry_finds_schedule_whenever_search_does():
+    rng = random.Random(0)
+    block = Block(1, 28)
+    for _ in range(30):
+        num_doctors = rng.randint(2, 5)
+        seniorities = [rng.choice([0, 1]) for _ in range(num_doctors)]
+        times = [(2, rng.choice([7, 11, 15, 19])) for _ in range(rng.randint(3, 6))]
+        schedules = []
+        for options in [{}, {'symmetry': True}, {'symmetry': True, 'backjump': True}, {'symmetry': True, 'order': 'mrv'}]:
+            doctors = [Doctor(block, f'Doctor {i}', seniority, carry_hours=0.0)
+                       for i, seniority in enumerate(seniorities)]
+            shifts = [Shift(block, 'Acute 1', day, time, 8, [0, 1]) for day, time in times]
+            schedules.append(Schedule(block, doctors, shifts, **options).schedule is not None)
+        assert len(set(schedules)) == 1
+
+
+def test_backtrack_limit_undoes_assignments():
+    block = Block(1, 28)
+    doctors, shifts = make_identical_mornings_case(block, 4)
+    schedule = Schedule(block, doctors, shifts, backtrack_limit=5)
+
+    assert schedule.stopped
+    assert schedule.schedule is None
+    assert all(shift.doctor is None for shift in shifts)
+    assert all(doctor.shifts == [] and doctor.actual_hours == 0 for doctor in doctors)
+
+
+def test_stopped_search_keeps_deepest_partial_schedule():
+    block = Block(1, 28)
+    doctors, shifts = make_identical_mornings_case(block, 4)
+    schedule = Schedule(block, doctors, shifts, node_limit=10)
+
+    assert schedule.stopped
+    assert [shift.location for shift, _ in schedule.partial] == ['Acute 1'] * 4
+    assert len({doctor for _, doctor in schedule.partial}) == 4
+    assert [shift.location for shift in schedule.uncovered] == ['Resus']
+    assert all(shift.doctor is None for shift in shifts)
+    assert 'NO SCHEDULE, filled 4 shifts, 1 uncovered' in repr(schedule)
+
+    schedule.apply_partial()
+    assert all(shift.doctor is doctor for shift, doctor in schedule.partial)
+
+
+def test_time_limit_stops_search():
+    block = Block(1, 28)
+    doctors, shifts = make_identical_mornings_case(block, 4)
+    schedule = Schedule(block, doctors, shifts, control=RunControl(time_limit=1e-9))
+
+    assert schedule.stopped
+    assert schedule.nodes == 0
+    assert schedule.partial == []
+    assert schedule.uncovered == shifts
+
+
+class StopAfter:
+    def __init__(self, checks):
+        self.checks = checks
+
+    def is_set(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def test_stop_is_checked_every_node():
+    block = Block(1, 28)
+    doctors, shifts = make_identical_mornings_case(block, 6)
+    schedule = Schedule(block, doctors, shifts, control=RunControl(stop=StopAfter(3)))
+
+    assert schedule.stopped
+    assert schedule.nodes == 3
+
+
+@pytest.mark.parametrize('engine', ['python', 'numpy', 'bitset'])
+def test_weekend_string_only_limits_weekend_shifts(engine):
+    """
+    Two weekend shifts in a row end the doctor's weekend string, but they can
+    still work on Monday, which breaks the string.
+    """
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    block = Block(1, 28)
+    doctor = Doctor(block, 'Off Service', 0, carry_hours=0.0)
+    # Saturday, Sunday and Monday mornings
+    shifts = [Shift(block, 'Acute 1', day, 7, 9, [0]) for day in [6, 7, 8]]
+
+    schedule = Schedule(block, [doctor], shifts, engine=engine)
 
+    assert schedule.schedule == shifts
+    assert doctor.consecutive_weekend_shifts == 0
@@ -0,0 +1,109 @@
+import threading
+
+from classes.block import Block
+from classes.control import RunControl
+from classes.doctor import Doctor
+from classes.schedule import Schedule
+from classes.shift import Shift
+from classes.split import SplitSearch, init_worker, solve_subtree
+from benchmarks.generator import make_doctors, make_shifts
+from parse import parse_shifts
+from tests.cases import make_daily_case, make_nogood_case
+
+
+def test_split_depth_collects_every_prefix():
+    block = Block(1, 28)
+    doctors = [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(3)]
+    shifts = [Shift(block, 'Acute 1', 2, 7, 8, [0]), Shift(block, 'Acute 2', 2, 7, 8, [0])]
+
+    schedule = Schedule(block, doctors, shifts, split_depth=2)
+
+    assert schedule.schedule is None
+    assert sorted(schedule.prefixes) == [[i, j] for i in range(3) for j in range(3) if i != j]
+    assert all(shift.doctor is None for shift in shifts)
+
+
+def test_split_search_finds_schedule():
+    block = Block(1, 28)
+    doctors, shifts = make_daily_case(block)
+    search = SplitSearch(block, doctors, shifts, workers=2, depth=2)
+
+    assert search.winner is not None
+    assert len(search.schedule) == len(shifts)
+    assert all(shift.doctor is not None for shift in shifts)
+
+
+def test_split_search_stops_workers_on_its_own_event():
+    block = Block(1, 28)
+    doctors, shifts = make_daily_case(block)
+    search = SplitSearch(block, doctors, shifts, workers=2, depth=2, control=RunControl(stop=threading.Event()))
+
+    assert search.winner is not None
+    assert all(shift.doctor is not None for shift in shifts)
+
+
+def test_split_search_proves_schedule_impossible():
+    block = Block(1, 28)
+    doctors, shifts = make_nogood_case(block)
+    search = SplitSearch(block, doctors, shifts, workers=2, depth=2)
+
+    assert search.schedule is None
+    assert len(search.items) == 2
+    assert search.proved_impossible()
+
+
+def test_split_search_at_settings_size():
+    block = Block(1, 28)
+    shifts = parse_shifts(block, '../settings/shifts.csv')
+    search = SplitSearch(block, make_doctors(block, 40), shifts, workers=2, depth=1, node_limit=200)
+
+    # Every item ran on the worker's doctors and shifts without copying them
+    assert len(search.stats) == len(search.items)
+    assert all(result['status'] == 'stopped' for result in search.stats)
+    assert all(shift.doctor is None for shift in shifts)
+
+
+def test_subtree_leaves_worker_inputs_unassigned():
+    block = Block(1, 28)
+    doctors = make_doctors(block, 60)
+    shifts = make_shifts(block, 300)
+    init_worker(block, doctors, shifts, {}, None)
+
+    first = solve_subtree((0, [0]))
+    second = solve_subtree((0, [0]))
+
+    assert first['status'] == 'complete'
+    assert second['assignments'] == first['assignments']
+    assert all(shift.doctor is None for shift in shifts)
+    assert all(doctor.actual_shifts == 0 and doctor.blocked == {} for doctor in doctors)
+
+
+def test_backjumping_collects_every_prefix():
+    block = Block(1, 28)
+    counts = []
+    for backjump in [False, True]:
+        doctors = [Doctor(block, f'Off Service {i}', 0, carry_hours=0.0) for i in range(3)]
+        # On different days, so every doctor can take both
+        shifts = [Shift(block, 'Acute 1', 2, 7, 8, [0]), Shift(block, 'Acute 2', 3, 7, 8, [0])]
+        schedule = Schedule(block, doctors, shifts, split_depth=2, backjump=backjump)
+        counts.append(len(schedule.prefixes))
+
+    assert counts == [9, 9]
+
+
+def test_backjumping_items_leave_worker_inputs_unassigned():
+    block = Block(1, 28)
+    doctors = [Doctor(block, 'F', 4, carry_hours=0.0)] + \
+              [Doctor(block, name, 0, carry_hours=0.0) for name in ['D', 'E']]
+    shifts = [Shift(block, 'Acute 1', 2, 7, 8, [4, 0]), Shift(block, 'Acute 2', 2, 8, 8, [0]),
+              Shift(block, 'Senior', 2, 16, 8, [4])]
+    prefixes = Schedule(block, doctors, shifts, split_depth=2, backjump=True).prefixes
+    init_worker(block, doctors, shifts, {'backjump': True}, None)
+
+    statuses = []
+    for item in enumerate(prefixes):
+        statuses.append(solve_subtree(item)['status'])
+        assert all(shift.doctor is None for shift in shifts)
+        assert all(doctor.actual_shifts == 0 and doctor.blocked == {} for doctor in doctors)
+
+    assert 'impossible' in statuses and 'complete' in statuses
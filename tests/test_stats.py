@@ -0,0 +1,51 @@
+import json
+
+from classes.block import Block
+from classes.control import RunControl
+from classes.schedule import Schedule
+from tests.cases import make_backjump_case, make_scarce_shift_case
+
+
+def test_stats_count_backtracks_per_shift(tmp_path):
+    block = Block(1, 28)
+    _, doctors, shifts = make_backjump_case(block)
+    schedule = Schedule(block, doctors, shifts, control=RunControl(stats=True))
+    stats = schedule.stats
+
+    assert stats.nodes == schedule.nodes
+    assert sum(stats.backtracks) == schedule.backtracks
+    assert stats.calls['assign'] == schedule.nodes
+    assert stats.calls['filter'] == sum(stats.candidates.values())
+    assert all(seconds >= 0 for seconds in stats.seconds.values())
+
+    exported = json.loads(stats.to_json(tmp_path / 'stats.json'))
+    assert exported == json.loads((tmp_path / 'stats.json').read_text())
+    assert exported['backtracks'] == schedule.backtracks
+    assert [shift['location'] for shift in exported['shifts']] == \
+        [shifts[i].location for i, count in enumerate(stats.backtracks) if count > 0]
+
+    _, doctors, shifts = make_backjump_case(block)
+    schedule = Schedule(block, doctors, shifts, backjump=True, control=RunControl(stats=True))
+    assert schedule.backjumps > 0
+    assert sum(schedule.stats.backtracks) == schedule.backtracks
+
+
+def test_stats_are_off_by_default():
+    block = Block(1, 28)
+    for engine in ['python', 'bitset']:
+        _, doctors, shifts = make_backjump_case(block)
+        assert Schedule(block, doctors, shifts, engine=engine).stats is None
+
+        _, doctors, shifts = make_backjump_case(block)
+        schedule = Schedule(block, doctors, shifts, engine=engine, control=RunControl(stats=True))
+        assert schedule.stats.calls['filter'] > 0
+
+
+def test_mrv_filters_once_per_shift_entered():
+    block = Block(1, 28)
+    _, doctors, shifts = make_scarce_shift_case(block)
+    schedule = Schedule(block, doctors, shifts, order='mrv', control=RunControl(stats=True))
+
+    assert schedule.backtracks == 0
+    assert schedule.stats.calls['filter'] == len(shifts)
+    assert schedule.stats.candidates == {1: 1, 2: 1}
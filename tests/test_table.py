@@ -0,0 +1,55 @@
+import pytest
+
+from benchmarks.generator import make_busy_doctors, make_doctors, make_shifts
+from classes.block import Block
+from classes.schedule import Schedule
+from classes.shift import link_conflicts
+
+np = pytest.importorskip('numpy')
+
+from classes.table import DoctorTable
+
+
+def test_table_filter_matches_python_filter():
+    block = Block(1, 28)
+    doctors = make_busy_doctors(block, 40)
+    doctors[0].add_mandatory_time_off(4, 12, 30)
+    shifts = make_shifts(block, 56, senior_nights=1)
+    link_conflicts(shifts)
+    table = DoctorTable(doctors, shifts)
+    schedule = Schedule.__new__(Schedule)
+
+    for shift in shifts:
+        assert table.filter_available_doctors(shift) == schedule.filter_available_doctors(doctors, shift)
+
+
+def test_table_filter_skips_blocked_shifts():
+    block = Block(1, 28)
+    doctors = make_doctors(block, 10)
+    shifts = make_shifts(block, 56)
+    link_conflicts(shifts)
+    table = DoctorTable(doctors, shifts)
+    schedule = Schedule.__new__(Schedule)
+    for doctor, shift in zip(doctors, shifts[::7]):
+        shift.assign_doctor(doctor)
+        table.update(doctor)
+
+    assert table.blocked.any()
+    for shift in shifts:
+        assert table.filter_available_doctors(shift) == schedule.filter_available_doctors(doctors, shift)
+
+    for doctor, shift in zip(doctors, shifts[::7]):
+        shift.unassign_doctor(doctor)
+        table.update(doctor)
+    assert not table.blocked.any()
+
+
+def test_numpy_engine_builds_same_schedule():
+    block = Block(1, 28)
+    python_doctors = make_doctors(block, 20)
+    python_schedule = Schedule(block, python_doctors, make_shifts(block, 28, senior_nights=1))
+    numpy_doctors = make_doctors(block, 20)
+    numpy_schedule = Schedule(block, numpy_doctors, make_shifts(block, 28, senior_nights=1), engine='numpy')
+
+    assert [shift.doctor.name for shift in python_schedule.schedule] == \
+           [shift.doctor.name for shift in numpy_schedule.schedule]